@@ -2,15 +2,23 @@ import streamlit as st
 import base64
 import random
 import string
-from models.llm import get_chat_model
-from models.embeddings import create_vectorstore
-from utils.rag_utils import get_rag_response_with_sources
-from utils.web_search import search_web
-from utils.document_loader import load_document
-from utils.insight_utils import generate_summary, extract_financial_metrics
+from models.llm import get_chat_model, get_model_name, get_pool_stats
+from models.embeddings import get_embeddings
+from utils.rag_utils import stream_rag_response_with_sources, stream_chat_response
+from utils.web_search import search_async, query_coverage
 from utils.question_refiner import is_response_poor, get_refinement_suggestions
-import requests
-from io import BytesIO
+from utils.ingest_cache import ingest_cache, IngestEntry, document_key, read_file_bytes
+from utils.ingest_scheduler import schedule_ingestion, is_pending
+from utils.pipeline import parse_and_chunk
+from utils.fetcher import fetch_document
+from utils.answer_cache import answer_cache
+from utils.workspace import Workspace
+from utils.tracing import tracer, start_metrics_server
+from config.config import ANSWER_CACHE_ENABLED, CONTEXT_CANDIDATES, SERPAPI_API_KEY, WEB_SEARCH_MIN_COVERAGE
+import time
+
+# 📈 Prometheus-style /metrics endpoint (only when METRICS_PORT is set; started once per process)
+start_metrics_server()
 
 # 🌟 Set up the Streamlit page
 st.markdown("""
@@ -52,9 +60,19 @@ if "messages" not in st.session_state:
 if "vectorstore" not in st.session_state:
     st.session_state.vectorstore = None
 
+if "workspace" not in st.session_state:
+    st.session_state.workspace = Workspace()
+
+if "removed_docs" not in st.session_state:
+    st.session_state.removed_docs = set()
+
 if "upload_key" not in st.session_state:
     st.session_state.upload_key = ''.join(random.choices(string.ascii_letters, k=10))
 
+# Tags this session's traces; the tracer (and its debug history) is shared by every session
+if "session_id" not in st.session_state:
+    st.session_state.session_id = ''.join(random.choices(string.ascii_letters, k=12))
+
 # --- Sidebar Settings ---
 with st.sidebar:
     st.header(":wrench: Settings")
@@ -62,6 +80,13 @@ with st.sidebar:
     model_option = st.selectbox("Choose LLM Provider", ["groq", "google"], help="Pick the backend model.")
     response_mode = st.radio("Response Mode", ["Concise", "Detailed"], help="Choose how detailed the response should be.")
     temperature = st.slider("Creativity (temperature)", 0.0, 1.0, 0.3, 0.1, help="Higher = more creative, lower = more factual.")
+    use_answer_cache = st.checkbox(
+        "⚡ Reuse answers to repeated questions", value=ANSWER_CACHE_ENABLED,
+        help="Serve cached answers for the same (or nearly the same) question on this document."
+    )
+    if use_answer_cache:
+        st.caption(f"Answer cache hit rate: {answer_cache.hit_rate():.0%}")
+    show_debug = st.checkbox("🐞 Show debug panel", value=False, help="Per-stage timings and token counts for the last question.")
 
     if st.button("🗑️ Reset / Upload New File"):
         for key in list(st.session_state.keys()):
@@ -94,65 +119,147 @@ st.caption("Upload a file or paste a document URL below to begin.")
 col1, col2 = st.columns(2)
 
 with col1:
-    uploaded_file = st.file_uploader(
+    uploaded_files = st.file_uploader(
         "Upload from File",
         type=["pdf", "docx", "xlsx", "txt"],
         key=st.session_state.upload_key,
-        help="Upload PDFs, Word, Excel, or text financial reports."
+        accept_multiple_files=True,
+        help="Upload PDFs, Word, Excel, or text financial reports. Add several to compare them."
     )
 
 with col2:
     doc_url = st.text_input("Or paste a direct document URL")
     if st.button("📥 Fetch Document") and doc_url:
-        try:
-            with st.spinner("Fetching document from URL..."):
-                headers = {"User-Agent": "Mozilla/5.0"}
-                response = requests.get(doc_url, headers=headers)
-
-                if response.status_code != 200:
-                    st.error("❌ Failed to fetch the document. Check the URL.")
-                    st.stop()
-
-                content_type = response.headers.get("content-type", "").lower()
-                suffix = ".pdf"
-                if "docx" in content_type:
-                    suffix = ".docx"
-                elif "xlsx" in content_type or "excel" in content_type:
-                    suffix = ".xlsx"
-                elif "text" in content_type or "plain" in content_type:
-                    suffix = ".txt"
-
-                uploaded_file = BytesIO(response.content)
-                uploaded_file.name = f"fetched{suffix}"
-                st.session_state.uploaded_file = uploaded_file
-                st.success("✅ Document fetched and ready for processing!")
+        with st.spinner("Fetching document from URL..."):
+            fetched_file = fetch_document(doc_url.strip())
 
-        except Exception as e:
-            st.error(f"❌ Error fetching file: {e}")
+        if isinstance(fetched_file, str):
+            st.error(fetched_file)
             st.stop()
 
-# --- Document Handling ---
-if uploaded_file or "uploaded_file" in st.session_state:
-    if not uploaded_file:
-        uploaded_file = st.session_state["uploaded_file"]
-
-    st.success("✅ Document uploaded successfully!")
-    with st.spinner("🔀 Processing document..."):
-        raw_text = load_document(uploaded_file)
-
-        if raw_text.startswith("❌"):
-            st.error(raw_text)
-            st.stop()
-
-        vectorstore = create_vectorstore(uploaded_file)
-
-        if isinstance(vectorstore, str) and vectorstore.startswith("❌"):
-            st.error(vectorstore)
-            st.stop()
+        st.session_state.setdefault("fetched_files", []).append(fetched_file)
+        if fetched_file.not_modified:
+            st.success("✅ Document unchanged since the last fetch; reusing the processed copy.")
+        else:
+            st.success("✅ Document fetched and ready for processing!")
 
-        st.session_state.vectorstore = vectorstore
-        st.session_state["doc_summary"] = str(generate_summary(raw_text, model_provider=model_option))
-        st.session_state["insights"] = str(extract_financial_metrics(raw_text, model_provider=model_option))
+# --- Document Handling ---
+workspace = st.session_state.workspace
+entries = {}
+ingest_pending = False
+retriever = None
+retrieval_filters = {}
+target_docs = []
+
+files = list(uploaded_files or []) + st.session_state.get("fetched_files", [])
+file_keys = set()
+
+for file in files:
+    # ♻️ Reruns (every chat message) look the document up instead of re-ingesting it
+    doc_key = getattr(file, "doc_key", None) or document_key(read_file_bytes(file))
+    file_keys.add(doc_key)
+    if doc_key in st.session_state.removed_docs or doc_key in entries:
+        continue
+
+    entry = ingest_cache.get(doc_key)
+    if entry is None:
+        with st.spinner(f"🔀 Processing {file.name}..."):
+            # PDF pages are chunked and embedded while later pages are still being extracted
+            parsed = parse_and_chunk(file, doc_key)
+
+            if isinstance(parsed, str):
+                st.error(f"{file.name}: {parsed}")
+                continue
+
+            parsed, chunks, vectors = parsed
+            entry = ingest_cache.put(IngestEntry(key=doc_key, document=parsed, chunks=chunks, chunk_vectors=vectors))
+
+    # ⚡ Embedding, summary and metrics run in parallel; each shows up as soon as it is ready
+    schedule_ingestion(entry, model_option)
+    ingest_pending = ingest_pending or is_pending(entry)
+
+    for task, error in list(entry.errors.items()):
+        if task == "vectorstore" or task.endswith(f":{model_option}"):
+            st.error(f"{file.name}: {error}")
+
+    # ➕ Only this document's chunks go into the shared workspace index
+    if entry.vectorstore is not None and doc_key not in workspace:
+        workspace.add(entry)
+    entries[doc_key] = entry
+
+# ➖ Documents dropped from the uploader (or removed below) leave the workspace
+for doc_id in list(workspace.documents):
+    if doc_id not in entries:
+        workspace.remove(doc_id)
+st.session_state.removed_docs &= file_keys
+
+st.session_state.vectorstore = workspace.vectorstore
+
+if entries:
+    st.success(f"✅ {len(entries)} document(s) ready for analysis!")
+
+    def doc_name(doc_id):
+        return entries[doc_id].document.name
+
+    with st.sidebar:
+        st.subheader("📚 Workspace")
+        for doc_id in list(entries):
+            name_col, remove_col = st.columns([5, 1])
+            name_col.caption(doc_name(doc_id))
+            if remove_col.button("✖", key=f"remove_{doc_id}", help="Remove from workspace"):
+                st.session_state.removed_docs.add(doc_id)
+                workspace.remove(doc_id)
+                st.rerun()
+
+        target_docs = st.multiselect(
+            "Ask about", list(workspace.documents), default=list(workspace.documents), format_func=doc_name,
+            help="Target one document, a subset, or all of them."
+        )
+
+    active_key = list(entries)[-1]
+    if len(entries) > 1:
+        active_key = st.selectbox("Show insights for", list(entries), index=len(entries) - 1, format_func=doc_name)
+    entry = entries[active_key]
+
+    st.session_state.pop("doc_summary", None)
+    st.session_state.pop("insights", None)
+    if model_option in entry.summaries:
+        st.session_state["doc_summary"] = entry.summaries[model_option]
+    elif model_option in entry.partial_summaries:
+        st.session_state["doc_summary"] = entry.partial_summaries[model_option] + " ▌"
+    if model_option in entry.metrics:
+        st.session_state["insights"] = entry.metrics[model_option]
+
+    # 🔎 Hybrid (BM25 + vector) retrieval, optionally narrowed to pages or sheets
+    if workspace.vectorstore is not None:
+        targeted = [entries[d].document for d in (target_docs or workspace.documents)]
+        with st.sidebar.expander("🔎 Retrieval Filters"):
+            page_numbers = [page for doc in targeted for page, _, _ in doc.pages]
+            if len(set(page_numbers)) > 1:
+                first, last = min(page_numbers), max(page_numbers)
+                page_range = st.slider("Page range", first, last, (first, last))
+                if page_range != (first, last):
+                    retrieval_filters["page"] = page_range
+
+            sheets = sorted({metadata["sheet"] for doc in targeted for metadata, _, _ in doc.blocks})
+            if len(sheets) > 1:
+                chosen = st.multiselect("Sheets", sheets, default=sheets)
+                if chosen and len(chosen) < len(sheets):
+                    retrieval_filters["sheet"] = chosen
+
+        # Extra candidates are trimmed to the provider's token budget by the context packer
+        retriever = workspace.retriever(target_docs or None, retrieval_filters, k=CONTEXT_CANDIDATES)
+
+    if ingest_pending:
+        waiting_for = [
+            label for label, ready in [
+                ("vectorstore", active_key in workspace),
+                ("summary", model_option in entry.summaries),
+                ("key metrics", model_option in entry.metrics),
+            ] if not ready
+        ]
+        if waiting_for:
+            st.info(f"⏳ Still processing {doc_name(active_key)}: {', '.join(waiting_for)}")
 
 # --- Display Key Financial Insights ---
 if "insights" in st.session_state:
@@ -198,47 +305,103 @@ if "doc_summary" in st.session_state:
         st.markdown(st.session_state["doc_summary"])
 
 # --- Chat Input ---
-prompt = st.chat_input("Type your question here...")
+# Chat opens as soon as the vectorstore exists, without waiting for summary/metrics
+waiting_for_index = bool(entries) and st.session_state.vectorstore is None and ingest_pending
+prompt = st.chat_input(
+    "Indexing document..." if waiting_for_index else "Type your question here...",
+    disabled=waiting_for_index,
+)
 
 if prompt:
     st.chat_message("user").markdown(prompt)
     st.session_state.messages.append({"role": "user", "content": prompt})
 
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            model = get_chat_model(provider=model_option, temperature=temperature)
-            system_prefix = "Answer concisely." if response_mode == "Concise" else "Provide a detailed and in-depth answer."
+    question_attrs = {"session": st.session_state.session_id, "provider": model_option, "docs": len(target_docs), "mode": response_mode}
+    with st.chat_message("assistant"), tracer.span("question", **question_attrs) as question_span:
+        model = get_chat_model(provider=model_option, temperature=temperature)
+        system_prefix = "Answer concisely." if response_mode == "Concise" else "Provide a detailed and in-depth answer."
+
+        # An empty "Ask about" selection searches every document, so it is cached under all of them
+        cache_scope = ("+".join(sorted(target_docs or workspace.documents)), model_option, get_model_name(model_option), f"{response_mode}|{sorted(retrieval_filters.items())}")
+        cached = answer_cache.lookup(*cache_scope, prompt, bypass=not use_answer_cache) if st.session_state.vectorstore else None
 
-            try:
-                if st.session_state.vectorstore:
-                    answer, sources = get_rag_response_with_sources(
-                        f"{system_prefix}\n{prompt}", st.session_state.vectorstore, model
+        # ✍️ Stream tokens into the message as they arrive; sources attach at the end
+        web_search = None
+        try:
+            question_span["cache_hit"] = bool(cached)
+            if cached:
+                response, sources = cached
+                st.markdown(response)
+                st.caption("⚡ Answered from cache")
+            elif st.session_state.vectorstore:
+                with st.spinner("Searching the document..."):
+                    tokens, sources = stream_rag_response_with_sources(
+                        prompt, st.session_state.vectorstore, model, retriever=retriever, instruction=system_prefix
                     )
-                    response = answer
-                else:
-                    system_message = "You are a helpful financial assistant. Provide clear and accurate answers to financial questions."
-                    response = model.invoke(f"{system_message}\n{prompt}").content
-                    sources = []
-
-            except Exception as e:
-                response = f"❗ Sorry, I couldn't process your question.\n\n**Error:** {str(e)}"
+                # 🌐 Weak retrieval: search the web while the answer streams instead of after it
+                if SERPAPI_API_KEY and query_coverage(prompt, sources) < WEB_SEARCH_MIN_COVERAGE:
+                    web_search = search_async(prompt)
+                response = st.write_stream(tokens)
+                if not is_response_poor(response):
+                    answer_cache.store(*cache_scope, prompt, response, sources)
+                elif SERPAPI_API_KEY and web_search is None:
+                    web_search = search_async(prompt)
+            else:
+                system_message = "You are a helpful financial assistant. Provide clear and accurate answers to financial questions."
+                response = st.write_stream(stream_chat_response(f"{system_message}\n{prompt}", model))
                 sources = []
 
+        except Exception as e:
+            response = f"❗ Sorry, I couldn't process your question.\n\n**Error:** {str(e)}"
+            sources = []
             st.markdown(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
-
-            if sources:
-                with st.expander("🔍 Sources Used", expanded=False):
-                    for i, chunk in enumerate(sources):
-                        st.markdown(f"**Chunk {i+1}:**\n> {chunk}")
-
-            if is_response_poor(response):
-                st.warning("⚠️ The response was unclear or incomplete.")
-                with st.expander("💡 Need help asking better questions?"):
-                    for tip in get_refinement_suggestions():
-                        st.markdown(f"- {tip}")
-
-
-
-
 
+        st.session_state.messages.append({"role": "assistant", "content": response})
+
+        if sources:
+            with st.expander("🔍 Sources Used", expanded=False):
+                for i, chunk in enumerate(sources):
+                    st.markdown(f"**Chunk {i+1}:**\n> {chunk}")
+
+        if web_search is not None:
+            web_results = web_search.result()
+            if web_results:
+                with st.expander("🌐 Found online", expanded=is_response_poor(response)):
+                    for result in web_results:
+                        title = f"[{result['title'] or result['link']}]({result['link']})" if result["link"] else result["title"]
+                        st.markdown(f"**{title}**\n> {result['snippet']}")
+
+        if is_response_poor(response):
+            st.warning("⚠️ The response was unclear or incomplete.")
+            with st.expander("💡 Need help asking better questions?"):
+                for tip in get_refinement_suggestions():
+                    st.markdown(f"- {tip}")
+
+# 🐞 Where the time went for the last question (and what the caches saved)
+if show_debug:
+    with st.expander("🐞 Debug: last request", expanded=True):
+        spans = tracer.last_trace("question", session=st.session_state.session_id)
+        if spans:
+            depth = {}
+            for span in spans:
+                depth[span["span_id"]] = depth.get(span["parent_id"], -1) + 1
+            st.dataframe(
+                [
+                    {"stage": "· " * depth[s["span_id"]] + s["name"], "ms": s["duration_ms"],
+                     **{k: v for k, v in s["attrs"].items() if k != "error"}, "error": s["attrs"].get("error", "")}
+                    for s in spans
+                ],
+                use_container_width=True,
+            )
+        else:
+            st.caption("No question answered yet.")
+        st.json({
+            "embeddings": get_embeddings().stats,
+            "chat_clients": get_pool_stats(),
+            "answer_cache": {**answer_cache.stats, "hit_rate": round(answer_cache.hit_rate(), 3)},
+        })
+
+# 🔄 Poll background ingestion so results appear without user interaction
+if ingest_pending:
+    time.sleep(1)
+    st.rerun()
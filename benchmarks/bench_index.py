@@ -0,0 +1,72 @@
+"""Recall / latency / memory of each FAISS index type against the exact (flat) baseline.
+
+    python -m benchmarks.bench_index --vectors 20000 100000 --dim 128
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from models.faiss_index import INDEX_TYPES, create_index, train_index
+
+
+def clustered_vectors(n, dim, seed=0, clusters=200):
+    """Embeddings cluster by topic, so uniform noise would flatter IVF; use Gaussian blobs instead."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    return (centers[labels] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def run(index_type, data, queries, truth, k):
+    start = time.perf_counter()
+    index = create_index(index_type, data.shape[1], len(data))
+    train_index(index, data)
+    index.add(data)
+    build = time.perf_counter() - start
+
+    latencies, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+    latencies.sort()
+
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return {
+        "benchmark": "faiss_index",
+        "index": index_type,
+        "vectors": len(data),
+        "build_seconds": round(build, 3),
+        f"recall@{k}": round(float(recall), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "index_mb": round(len(faiss.serialize_index(index)) / 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, nargs="+", default=[20_000, 100_000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES))
+    args = parser.parse_args()
+
+    for n in args.vectors:
+        data = clustered_vectors(n, args.dim)
+        queries = clustered_vectors(args.queries, args.dim, seed=1)
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(data)
+        _, truth = exact.search(queries, args.k)
+
+        for index_type in args.types:
+            print(json.dumps(run(index_type, data, queries, truth, args.k)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""PDF extraction benchmark over synthetic multi-hundred-page filings.
+
+    python -m benchmarks.bench_pdf --pages 100 300 600
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from io import BytesIO
+
+from benchmarks.synthetic import make_pdf
+from utils.document_loader import iter_pdf_pages
+from config.config import PDF_WORKERS
+
+
+def run(pages, workers):
+    file = BytesIO(make_pdf(pages))
+    file.name = "synthetic.pdf"
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_page = None
+    chars = 0
+    for _, text in iter_pdf_pages(file, workers=workers):
+        if first_page is None:
+            first_page = time.perf_counter() - start
+        chars += len(text)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "benchmark": "pdf_extract",
+        "pages": pages,
+        "workers": workers,
+        "seconds": round(total, 4),
+        "first_page_seconds": round(first_page or 0.0, 4),
+        "pages_per_second": round(pages / total, 1),
+        "chars": chars,
+        "peak_mb": round(peak / 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 300, 600])
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, PDF_WORKERS}))
+    args = parser.parse_args()
+
+    for pages in args.pages:
+        for workers in args.workers:
+            print(json.dumps(run(pages, workers)))
+
+
+if __name__ == "__main__":
+    main()
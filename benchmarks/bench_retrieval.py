@@ -0,0 +1,82 @@
+"""Retrieval quality and latency: dense-only vs hybrid (BM25 + dense).
+
+    python -m benchmarks.bench_retrieval --chunks 2000 --queries 200
+
+Every chunk carries a unique note number and fiscal year, and each query asks about one of
+them, which is the exact-token lookup that dense-only retrieval tends to miss.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from benchmarks.fakes import HashingEmbeddings
+from benchmarks.synthetic import synthetic_lines
+from utils.hybrid_retriever import BM25Index, HybridRetriever
+
+
+def build_corpus(chunks, seed=0):
+    lines = synthetic_lines(chunks * 3, seed)
+    docs = []
+    for i in range(chunks):
+        body = " ".join(next(lines) for _ in range(3))
+        docs.append(Document(
+            page_content=f"Note {100000 + i} (FY{2000 + i % 25}): {body}",
+            metadata={"page": i // 10 + 1, "note": 100000 + i},
+        ))
+    return docs
+
+
+def measure(name, search, queries, k):
+    latencies, hits = [], 0
+    for question, expected in queries:
+        start = time.perf_counter()
+        docs = search(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(doc.metadata.get("note") == expected for doc in docs[:k])
+    latencies.sort()
+    return {
+        "benchmark": "retrieval",
+        "retriever": name,
+        f"recall@{k}": round(hits / len(queries), 3),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    docs = build_corpus(args.chunks)
+    start = time.perf_counter()
+    vectorstore = FAISS.from_documents(docs, HashingEmbeddings())
+    dense_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sparse_index = BM25Index.from_vectorstore(vectorstore)
+    sparse_build = time.perf_counter() - start
+    print(json.dumps({
+        "benchmark": "retrieval_build", "chunks": args.chunks,
+        "dense_seconds": round(dense_build, 3), "bm25_seconds": round(sparse_build, 3),
+    }))
+
+    rng = random.Random(1)
+    queries = []
+    for i in rng.sample(range(args.chunks), args.queries):
+        queries.append((f"What does Note {100000 + i} say?", 100000 + i))
+
+    retriever = HybridRetriever(vectorstore=vectorstore, sparse_indexes=[sparse_index], k=args.k)
+    print(json.dumps(measure("dense", lambda q: vectorstore.similarity_search(q, k=args.k), queries, args.k)))
+    print(json.dumps(measure("hybrid", retriever.invoke, queries, args.k)))
+
+
+if __name__ == "__main__":
+    main()
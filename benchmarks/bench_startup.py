@@ -0,0 +1,144 @@
+"""Cold-start and per-rerun time budget for the Streamlit app, with an import-time profile.
+
+    python -m benchmarks.bench_startup                     # exits 1 when a budget is exceeded
+    python -m benchmarks.bench_startup --cold-budget 1.5 --rerun-budget 0.3 --top 30
+
+Cold start is a fresh interpreter importing the app's own modules (everything app.py imports
+from models/, utils/ and config/), measured against a bare interpreter; Streamlit's own import
+is the same for every app and is left out. The profile comes from `python -X importtime` and
+lists the packages and modules that cost the most. A rerun is app.py executed by Streamlit's
+AppTest, first for a new session and then again, as on every widget interaction.
+
+FAISS, langchain_community and the text splitter load on first use, not at startup. What
+remains is mostly langchain_core (about 0.6 s, half of it LangSmith), which the app's
+Document, Embeddings and retriever classes build on at import time.
+"""
+import argparse
+import ast
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+
+COLD_START_BUDGET_S = 2.0
+RERUN_BUDGET_S = 0.5
+
+
+def app_imports(path=APP):
+    """First-party modules imported anywhere in app.py, in order."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in ast.walk(tree):
+        names = [alias.name for alias in node.names] if isinstance(node, ast.Import) else (
+            [node.module] if isinstance(node, ast.ImportFrom) and node.module and not node.level else [])
+        for name in names:
+            root = name.split(".")[0]
+            if os.path.exists(os.path.join(ROOT, root)) and name not in modules:
+                modules.append(name)
+    return modules
+
+
+def _interpreter(code, importtime=False):
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"❌ Import failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+
+def cold_start(modules, repeat):
+    """Median seconds to import `modules` in a fresh interpreter, beyond bare startup."""
+    code = "; ".join(f"import {module}" for module in modules)
+    bare = statistics.median(_interpreter("pass")[0] for _ in range(repeat))
+    loaded = statistics.median(_interpreter(code)[0] for _ in range(repeat))
+    return max(loaded - bare, 0.0)
+
+
+def import_profile(modules, top):
+    """(self time per top-level package, slowest modules by cumulative time), in seconds."""
+    _, stderr = _interpreter("; ".join(f"import {module}" for module in modules), importtime=True)
+    packages, rows = defaultdict(int), []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        packages[module.split(".")[0]] += int(self_us)
+        rows.append((module, int(cumulative_us)))
+
+    by_package = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    by_module = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    return (
+        [{"package": name, "self_s": round(us / 1e6, 4)} for name, us in by_package],
+        [{"module": name, "cumulative_s": round(us / 1e6, 4)} for name, us in by_module],
+    )
+
+
+def rerun_times(path, runs):
+    """(new-session run seconds, median rerun seconds) for app.py under Streamlit's AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    from utils.tracing import tracer
+
+    tracer.path = None
+    app = AppTest.from_file(path, default_timeout=120)
+
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"❌ app.py raised: {app.exception[0].message}")
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        app.run()
+        times.append(time.perf_counter() - start)
+    return first, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cold-budget", type=float, default=COLD_START_BUDGET_S, help="Seconds")
+    parser.add_argument("--rerun-budget", type=float, default=RERUN_BUDGET_S, help="Seconds")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per cold-start measurement")
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="Profile rows to print")
+    parser.add_argument("--no-rerun", action="store_true", help="Only measure imports (no Streamlit installed)")
+    args = parser.parse_args()
+    if not args.no_rerun and importlib.util.find_spec("streamlit") is None:
+        print("⚠️ Streamlit is not installed; measuring imports only.", file=sys.stderr)
+        args.no_rerun = True
+
+    modules = app_imports()
+    packages, slowest = import_profile(modules, args.top)
+    for row in packages + slowest:
+        print(json.dumps(row))
+
+    results = [{"benchmark": "cold_start", "modules": len(modules),
+                "seconds": round(cold_start(modules, args.repeat), 4), "budget_s": args.cold_budget}]
+    if not args.no_rerun:
+        first, rerun = rerun_times(APP, args.reruns)
+        results.append({"benchmark": "new_session", "seconds": round(first, 4)})
+        results.append({"benchmark": "rerun", "seconds": round(rerun, 4), "budget_s": args.rerun_budget})
+
+    over = [result for result in results if "budget_s" in result and result["seconds"] > result["budget_s"]]
+    for result in results:
+        print(json.dumps({**result, "ok": result not in over}))
+    if over:
+        print(f"❌ Over budget: {', '.join(result['benchmark'] for result in over)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
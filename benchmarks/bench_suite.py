@@ -0,0 +1,254 @@
+"""Offline benchmark suite for the ingestion and RAG hot paths.
+
+    python -m benchmarks.bench_suite --out bench.json
+    python -m benchmarks.bench_suite --pages 10 100 --llm-latency 0.2 --baseline bench-main.json
+
+Synthetic PDF/DOCX/XLSX/TXT documents, the hashing embedder and a fake chat model keep every
+number reproducible, so results files from two commits can be compared directly.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fakes import FakeChatModel, install_fakes
+from benchmarks.synthetic import make_document
+from models.embeddings import build_vectorstore, split_document
+from models.llm import get_chat_model
+from utils.document_loader import parse_document
+from utils.hybrid_retriever import BM25Index, HybridRetriever
+from utils.ingest_cache import document_key, read_file_bytes
+from utils.pipeline import ensure_index, parse_and_chunk
+from utils.rag_utils import stream_rag_response_with_sources
+from utils.tracing import tracer
+
+FILE_TYPES = ("pdf", "docx", "xlsx", "txt")
+
+# Lower is better for every metric compared against a baseline
+COMPARED_SUFFIXES = ("_s", "_ms", "_mb")
+
+
+def timed(fn, repeat):
+    """Median wall time of `repeat` calls, with the last call's result."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def peak_mb(fn):
+    """Peak Python heap (incl. numpy buffers) while fn runs; worker processes are not included."""
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def percentiles(latencies_ms):
+    ordered = sorted(latencies_ms)
+
+    def at(q):
+        return round(ordered[min(int(len(ordered) * q), len(ordered) - 1)], 3)
+
+    return {"p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99)}
+
+
+def bench_document(file_type, pages, repeat):
+    """Parse throughput, chunking speed, index build time and peak memory for one document."""
+    file = make_document(file_type, pages)
+    size = len(file.getvalue())
+
+    parse_s, parsed = timed(lambda: parse_document(file), repeat)
+    chunk_s, chunks = timed(lambda: split_document(parsed), repeat)
+
+    def build():
+        install_fakes()  # fresh vector cache: every build embeds from scratch
+        return build_vectorstore(chunks)
+
+    build_s, vectorstore = timed(build, repeat)
+    bm25_s, _ = timed(lambda: BM25Index.from_vectorstore(vectorstore), repeat)
+
+    def pipeline():
+        install_fakes()
+        build_vectorstore(split_document(parse_document(file)))
+
+    return {
+        "benchmark": "ingest",
+        "file_type": file_type,
+        "pages": pages,
+        "bytes": size,
+        "chars": len(parsed.text),
+        "chunks": len(chunks),
+        "parse_s": round(parse_s, 4),
+        "parse_mb_per_s": round(size / 1e6 / parse_s, 2),
+        "chunk_s": round(chunk_s, 4),
+        "chunks_per_s": round(len(chunks) / chunk_s, 1),
+        "index_build_s": round(build_s, 4),
+        "bm25_build_s": round(bm25_s, 4),
+        "peak_mb": peak_mb(pipeline),
+    }
+
+
+def questions(count, seed=0):
+    rng = random.Random(seed)
+    templates = [
+        "What was the revenue from operations in FY{year}?",
+        "How did net profit change in FY{year}?",
+        "What does Note {note} say about trade receivables?",
+        "What were the ROE and ROCE for FY{year}?",
+        "Why did finance costs increase in FY{year}?",
+    ]
+    # Numbered so no two questions share an embedding-cache entry
+    return [
+        f"{rng.choice(templates).format(year=rng.randint(2015, 2024), note=rng.randint(1, 40))} (#{i})"
+        for i in range(count)
+    ]
+
+
+def bench_queries(pages, count, k):
+    """Retrieval and full-answer latency percentiles against one indexed document."""
+    install_fakes()
+    chunks = split_document(parse_document(make_document("pdf", pages)))
+    vectorstore = build_vectorstore(chunks)
+    retriever = HybridRetriever(
+        vectorstore=vectorstore, sparse_indexes=[BM25Index.from_vectorstore(vectorstore)], k=k
+    )
+    model = get_chat_model(provider="groq", temperature=0.3)
+
+    results = []
+    for name, search in [
+        ("dense", lambda q: vectorstore.similarity_search(q, k=k)),
+        ("hybrid", retriever.invoke),
+        ("answer", lambda q: "".join(stream_rag_response_with_sources(q, vectorstore, model, k=k, retriever=retriever)[0])),
+    ]:
+        latencies = []
+        for question in questions(count, seed=len(results)):
+            start = time.perf_counter()
+            search(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append({"benchmark": "query", "mode": name, "pages": pages, "chunks": len(chunks),
+                        "queries": count, **percentiles(latencies)})
+    return results
+
+
+def bench_first_answer(file_type, pages, index_dir):
+    """Upload to first streamed answer token: parse, chunk, embed, index, retrieve, first token.
+    Goes through parse_and_chunk like the app, so PDFs are embedded while pages are extracted."""
+    install_fakes(index_dir=os.path.join(index_dir, f"{file_type}-{pages}"))
+    file = make_document(file_type, pages)
+    model = get_chat_model(provider="groq", temperature=0.3)
+
+    start = time.perf_counter()
+    key = document_key(read_file_bytes(file))
+    _, chunks, vectors = parse_and_chunk(file, key)
+    vectorstore, sparse_index = ensure_index(key, chunks, vectors)
+    retriever = HybridRetriever(vectorstore=vectorstore, sparse_indexes=[sparse_index])
+    tokens, _ = stream_rag_response_with_sources("What was the net profit?", vectorstore, model, retriever=retriever)
+    next(tokens)
+    first_token = time.perf_counter() - start
+    list(tokens)
+    total = time.perf_counter() - start
+
+    return {"benchmark": "first_answer", "file_type": file_type, "pages": pages,
+            "first_token_s": round(first_token, 4), "full_answer_s": round(total, 4)}
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+        return revision.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result):
+    return tuple(result.get(field) for field in ("benchmark", "file_type", "mode", "pages"))
+
+
+def compare(results, baseline):
+    """Percent change per timing/memory metric against a baseline results file."""
+    previous = {result_key(result): result for result in baseline["results"]}
+    changes = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        for metric, value in result.items():
+            if metric.endswith(COMPARED_SUFFIXES) and before.get(metric):
+                changes.append({
+                    "key": [part for part in result_key(result) if part is not None],
+                    "metric": metric,
+                    "before": before[metric],
+                    "after": value,
+                    "change_pct": round((value - before[metric]) / before[metric] * 100, 1),
+                })
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200], help="Document sizes, in pages")
+    parser.add_argument("--types", nargs="+", default=list(FILE_TYPES), choices=FILE_TYPES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake chat model seconds to first token")
+    parser.add_argument("--llm-token-latency", type=float, default=0.0, help="Fake chat model seconds per token")
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    tracer.path = None  # spans still run (they are part of the cost) but are not written to disk
+    install_fakes(chat_model=FakeChatModel(first_token_latency=args.llm_latency, token_latency=args.llm_token_latency))
+
+    results = []
+
+    def emit(result):
+        results.append(result)
+        print(json.dumps(result))
+
+    for file_type in args.types:
+        for pages in args.pages:
+            emit(bench_document(file_type, pages, args.repeat))
+
+    for result in bench_queries(max(args.pages), args.queries, args.k):
+        emit(result)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        for file_type in args.types:
+            emit(bench_first_answer(file_type, max(args.pages), index_dir))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(results, json.load(f))
+        for change in report["comparison"]:
+            print(json.dumps(change))
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Deterministic offline stand-ins for the embedding and chat providers."""
+import hashlib
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag of hashed word and character-trigram features: deterministic, no network, and
+    similar texts land close together, so retrieval quality numbers are meaningful."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = text.lower().split()
+        features = words + [w[i:i + 3] for w in words for i in range(max(len(w) - 2, 1))]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class FakeChatModel:
+    """Chat model with the `invoke` / `stream` surface the app uses and a configurable latency:
+    `first_token_latency` seconds before the first token, then `token_latency` per token."""
+
+    def __init__(self, reply="Revenue: Rs 150 Cr\nNet Profit: Rs 20 Cr\nEBITDA: Rs 35 Cr",
+                 first_token_latency=0.0, token_latency=0.0):
+        self.reply = reply
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.calls = 0
+
+    def _tokens(self):
+        return self.reply.split(" ")
+
+    def stream(self, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.first_token_latency)
+        tokens = self._tokens()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_latency)
+            yield AIMessageChunk(content=token if i == len(tokens) - 1 else token + " ")
+
+    def invoke(self, messages, **kwargs):
+        return AIMessage(content="".join(chunk.content for chunk in self.stream(messages)))
+
+
+def install_fakes(embeddings=None, chat_model=None, index_dir=None):
+    """Route the app's embedding / chat singletons to the fakes and keep indexes in `index_dir`,
+    so no run is served from an earlier run's caches."""
+    import models.embeddings
+    import models.index_store
+    import models.llm
+    from models.embedding_cache import CachedEmbeddings, VectorCache
+
+    models.embeddings._embeddings = CachedEmbeddings(
+        embeddings or HashingEmbeddings(), namespace="fake", cache=VectorCache(":memory:")
+    )
+    if chat_model is not None:
+        models.llm._create_chat_model = lambda provider, model, temperature: chat_model
+        models.llm._clients.clear()
+    if index_dir is not None:
+        models.index_store._store = models.index_store.IndexStore(root=index_dir)
@@ -0,0 +1,119 @@
+"""Synthetic financial documents for the benchmarks (no external files needed)."""
+import random
+from io import BytesIO
+
+import docx
+import pandas as pd
+
+LINE_TEMPLATES = [
+    "Revenue from operations for FY{year} stood at Rs {a:,} Cr compared to Rs {b:,} Cr in FY{prev}.",
+    "Net profit for the quarter was Rs {a:,} Cr, a change of {pct}% over the previous year.",
+    "EBITDA margin improved to {pct}% driven by lower input costs and operating leverage.",
+    "Note {note}: Trade receivables of Rs {a:,} Lakh are considered good and recoverable.",
+    "Return on equity (ROE) was {pct}% and return on capital employed (ROCE) was {pct2}%.",
+    "The Board recommended a final dividend of Rs {small} per equity share for FY{year}.",
+    "Finance costs increased to Rs {a:,} Cr due to higher borrowings for capital expenditure.",
+    "Segment revenue from the retail business grew to Rs {b:,} Cr in the year under review.",
+]
+
+
+def synthetic_lines(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        year = rng.randint(2015, 2024)
+        yield rng.choice(LINE_TEMPLATES).format(
+            year=year, prev=year - 1, a=rng.randint(10, 99999), b=rng.randint(10, 99999),
+            pct=round(rng.uniform(-20, 40), 1), pct2=round(rng.uniform(1, 30), 1),
+            note=rng.randint(1, 40), small=rng.randint(1, 30),
+        )
+
+
+def synthetic_text(lines=1000, seed=0):
+    return "\n".join(synthetic_lines(lines, seed))
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages, lines_per_page=40, seed=0):
+    """Minimal multi-page PDF with real text content streams, readable by PyPDF2."""
+    lines = synthetic_lines(pages * lines_per_page, seed)
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]  # 1 catalog, 2 pages, 3 font
+    page_ids = []
+
+    for _ in range(pages):
+        body = ["BT /F1 9 Tf 11 TL 40 800 Td"]
+        for _ in range(lines_per_page):
+            body.append(f"({_pdf_escape(next(lines))}) '")
+        body.append("ET")
+        stream = "\n".join(body).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_docx(paragraphs, table_rows=50, seed=0):
+    document = docx.Document()
+    for line in synthetic_lines(paragraphs, seed):
+        document.add_paragraph(line)
+    table = document.add_table(rows=table_rows + 1, cols=3)
+    for i, row in enumerate(table.rows):
+        row.cells[0].text, row.cells[1].text, row.cells[2].text = (
+            ("Particulars", "FY2024", "FY2023") if i == 0 else (f"Line item {i}", str(1000 + i), str(900 + i))
+        )
+    out = BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def make_xlsx(rows, sheets=3, seed=0):
+    rng = random.Random(seed)
+    out = BytesIO()
+    with pd.ExcelWriter(out) as writer:
+        for sheet in range(sheets):
+            pd.DataFrame({
+                "Particulars": [f"Line item {i}" for i in range(rows)],
+                "FY2024": [rng.randint(10, 99999) for _ in range(rows)],
+                "FY2023": [rng.randint(10, 99999) for _ in range(rows)],
+                "Change %": [round(rng.uniform(-20, 40), 1) for _ in range(rows)],
+            }).to_excel(writer, sheet_name=f"Sheet{sheet + 1}", index=False)
+    return out.getvalue()
+
+
+def make_document(file_type, pages, seed=0):
+    """An uploaded-file-like BytesIO of roughly `pages` pages (40 lines / rows per page)."""
+    lines = pages * 40
+    if file_type == "pdf":
+        data = make_pdf(pages, seed=seed)
+    elif file_type == "docx":
+        data = make_docx(lines, seed=seed)
+    elif file_type == "xlsx":
+        data = make_xlsx(lines // 3, seed=seed)
+    elif file_type == "txt":
+        data = synthetic_text(lines, seed).encode("utf-8")
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+    file = BytesIO(data)
+    file.name = f"synthetic-{pages}p.{file_type}"
+    return file
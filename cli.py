@@ -0,0 +1,69 @@
+"""Headless ingestion and Q&A, e.g. for nightly batch jobs.
+
+    python cli.py ingest report.pdf
+    python cli.py batch filings/ --out results.jsonl --workers 8
+    python cli.py ask <doc_key> "What is the net profit?"
+
+Indexes, summaries and metrics are written to the shared index store, so the Streamlit app
+opens any processed filing instantly.
+"""
+import argparse
+import json
+import sys
+
+from utils.pipeline import ask, ingest_directory, open_document, process_document
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Financial document processing without the web UI.")
+    parser.add_argument("--provider", default="groq", choices=["groq", "google", "openai"])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_cmd = commands.add_parser("ingest", help="Process one or more files")
+    ingest_cmd.add_argument("files", nargs="+")
+    ingest_cmd.add_argument("--no-insights", action="store_true", help="Index only; skip summary and metrics")
+
+    batch_cmd = commands.add_parser("batch", help="Process a directory with a worker pool (resumable)")
+    batch_cmd.add_argument("directory")
+    batch_cmd.add_argument("--out", default="results.jsonl")
+    batch_cmd.add_argument("--checkpoint", default=None)
+    batch_cmd.add_argument("--workers", type=int, default=4)
+    batch_cmd.add_argument("--no-insights", action="store_true")
+
+    ask_cmd = commands.add_parser("ask", help="Ask a question about a processed document")
+    ask_cmd.add_argument("doc_key", help="doc_key from an ingest record, or a file path")
+    ask_cmd.add_argument("question")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        failed = False
+        for path in args.files:
+            record = process_document(open_document(path), provider=args.provider, insights=not args.no_insights)
+            print(json.dumps(record, ensure_ascii=False))
+            failed = failed or record["status"] != "ok"
+        return 1 if failed else 0
+
+    if args.command == "batch":
+        stats = ingest_directory(
+            args.directory, args.out, checkpoint=args.checkpoint, workers=args.workers,
+            provider=args.provider, insights=not args.no_insights,
+        )
+        print(json.dumps(stats), file=sys.stderr)
+        return 1 if stats["error"] else 0
+
+    if args.command == "ask":
+        doc_key = args.doc_key
+        if any(doc_key.lower().endswith(ext) for ext in (".pdf", ".docx", ".xlsx", ".txt")):
+            record = process_document(open_document(doc_key), provider=args.provider, insights=False)
+            if record["status"] != "ok":
+                print(record["error"], file=sys.stderr)
+                return 1
+            doc_key = record["doc_key"]
+        answer, sources = ask(doc_key, args.question, provider=args.provider)
+        print(json.dumps({"doc_key": doc_key, "answer": answer, "sources": sources}, ensure_ascii=False))
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
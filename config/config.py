@@ -3,8 +3,98 @@ from dotenv import load_dotenv
 
 load_dotenv()  # This loads your .env file
 
+# Caches and artifacts live under the repository, not the working directory, so a batch job
+# started from elsewhere (cron, cli.py) writes where the web app reads
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(ROOT_DIR, ".cache"))
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
-print("GROQ:", os.getenv("GROQ_API_KEY")) 
\ No newline at end of file
+
+# Chunking / embedding settings (part of the ingest cache key)
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 800))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 150))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+
+# "google" (Gemini API) or "local" (sentence-transformers, works offline)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "google")
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_ID = f"{EMBEDDING_BACKEND}:{LOCAL_EMBEDDING_MODEL if EMBEDDING_BACKEND == 'local' else EMBEDDING_MODEL}"
+
+# Embedding requests: batch size, parallel requests, retries, and the persistent vector cache
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", 4))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", 3))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(CACHE_DIR, "embeddings.sqlite"))
+
+# Max number of processed documents kept in memory
+INGEST_CACHE_SIZE = int(os.getenv("INGEST_CACHE_SIZE", 8))
+
+# FAISS index type: "auto" picks by corpus size (flat -> ivf -> ivfpq); "hnsw" must be chosen explicitly
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto")
+FAISS_FLAT_MAX = int(os.getenv("FAISS_FLAT_MAX", 50_000))
+FAISS_IVF_MAX = int(os.getenv("FAISS_IVF_MAX", 1_000_000))
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", 16))
+FAISS_TRAIN_SAMPLE = int(os.getenv("FAISS_TRAIN_SAMPLE", 100_000))
+
+# Answer cache for repeated questions (TTL in seconds, cosine similarity for near-duplicates)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 500))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 24 * 3600))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.95))
+
+# PDF extraction: process pool size, pages per task, and the size below which extraction stays serial
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 8))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 24))
+
+# Map-reduce summary / metric extraction over the whole document
+SECTION_TOKENS = int(os.getenv("SECTION_TOKENS", 3000))
+MAP_REDUCE_WORKERS = int(os.getenv("MAP_REDUCE_WORKERS", 4))
+SECTION_CACHE_SIZE = int(os.getenv("SECTION_CACHE_SIZE", 2000))
+
+# Rendered insight charts (PNG bytes) kept per distinct set of metrics
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", 32))
+
+# Background threads for embedding / summary / metric extraction
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 6))
+# A failed stage (e.g. a provider 429) is retried by the next rerun after this many seconds
+INGEST_RETRY_SECONDS = float(os.getenv("INGEST_RETRY_SECONDS", 30))
+
+# On-disk FAISS index store (shared across sessions and restarts)
+INDEX_STORE_DIR = os.getenv("INDEX_STORE_DIR", os.path.join(CACHE_DIR, "indexes"))
+INDEX_STORE_MAX_MB = int(os.getenv("INDEX_STORE_MAX_MB", 2048))
+
+# RAG context packing: candidate chunks retrieved per question, and the context token budget per provider
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", 8))
+CONTEXT_TOKENS = {
+    "groq": int(os.getenv("CONTEXT_TOKENS_GROQ", 768)),
+    "google": int(os.getenv("CONTEXT_TOKENS_GOOGLE", 1024)),
+    "openai": int(os.getenv("CONTEXT_TOKENS_OPENAI", 1024)),
+    "default": int(os.getenv("CONTEXT_TOKENS", 768)),
+}
+
+# URL fetching: size cap, bytes kept in memory before spilling to disk, read timeout (s), conditional-GET cache
+FETCH_MAX_MB = int(os.getenv("FETCH_MAX_MB", 100))
+FETCH_SPOOL_MB = int(os.getenv("FETCH_SPOOL_MB", 8))
+FETCH_TIMEOUT = (5, int(os.getenv("FETCH_TIMEOUT", 30)))
+FETCH_CACHE_DIR = os.getenv("FETCH_CACHE_DIR", os.path.join(CACHE_DIR, "fetch"))
+FETCH_CACHE_MAX_MB = int(os.getenv("FETCH_CACHE_MAX_MB", 512))
+
+# Web search fallback (SerpAPI): results kept, (connect, read) timeout, cache, and the share of
+# question terms retrieval must cover before a search is started alongside the answer
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search")
+WEB_SEARCH_RESULTS = int(os.getenv("WEB_SEARCH_RESULTS", 5))
+WEB_SEARCH_TIMEOUT = (3, float(os.getenv("WEB_SEARCH_TIMEOUT", 8)))
+WEB_SEARCH_CACHE_TTL = int(os.getenv("WEB_SEARCH_CACHE_TTL", 3600))
+WEB_SEARCH_CACHE_SIZE = int(os.getenv("WEB_SEARCH_CACHE_SIZE", 256))
+WEB_SEARCH_MIN_COVERAGE = float(os.getenv("WEB_SEARCH_MIN_COVERAGE", 0.5))
+
+# Tracing: per-stage spans appended to a JSONL file; METRICS_PORT > 0 serves Prometheus text at /metrics
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+TRACE_PATH = os.getenv("TRACE_PATH", os.path.join(CACHE_DIR, "traces.jsonl"))
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", 50))
+TRACE_MAX_MB = float(os.getenv("TRACE_MAX_MB", 20))  # traces.jsonl rolls over to traces.jsonl.1 past this
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_WORKERS,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_CACHE_PATH,
+)
+from utils.tracing import tracer
+
+
+class VectorCache:
+    """Persistent text-hash -> vector map in SQLite, shared by every process on the machine."""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB)")
+            self._conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            # SQLite caps the number of bound parameters, so look keys up in slices
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items],
+            )
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Drop-in `embedding=` wrapper: dedupes texts, serves repeats from the vector cache,
+    and embeds misses in batches with bounded concurrency and retry/backoff."""
+
+    def __init__(self, base, namespace, cache=None, batch_size=EMBEDDING_BATCH_SIZE,
+                 max_workers=EMBEDDING_MAX_WORKERS, max_retries=EMBEDDING_MAX_RETRIES, backoff=1.0):
+        self.base = base
+        self.namespace = namespace  # backend + model, so vectors from different models never mix
+        self.cache = cache if cache is not None else VectorCache()
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats = {"hits": 0, "misses": 0, "provider_calls": 0}
+        self._stats_lock = threading.Lock()  # shared by session threads, ingest and batch pools
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def _embed_batch(self, texts):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._count(provider_calls=1)
+                return self.base.embed_documents(texts)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff * (2 ** attempt))
+
+    def embed_documents(self, texts):
+        with tracer.span("embed", backend=self.namespace, texts=len(texts)) as span:
+            return self._embed_documents(texts, span)
+
+    def _embed_documents(self, texts, span):
+        keys = [self._key(text) for text in texts]
+        unique = dict(zip(keys, texts))  # dedupe repeated chunks within the call
+
+        vectors = self.cache.get_many(list(unique))
+        missing = [key for key in unique if key not in vectors]
+        self._count(hits=len(unique) - len(missing), misses=len(missing))
+        span.update(unique=len(unique), cached=len(unique) - len(missing), cache_hit=not missing)
+
+        if missing:
+            batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = pool.map(lambda batch: self._embed_batch([unique[k] for k in batch]), batches)
+                for batch, batch_vectors in zip(batches, results):
+                    fresh = list(zip(batch, batch_vectors))
+                    self.cache.put_many(fresh)
+                    vectors.update(fresh)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        # Providers may embed queries differently from documents, so they get their own keys
+        key = self._key(f"query\0{text}")
+        with tracer.span("embed_query", backend=self.namespace) as span:
+            cached = self.cache.get_many([key])
+            span["cache_hit"] = key in cached
+            if key in cached:
+                self._count(hits=1)
+                return cached[key]
+
+            self._count(misses=1)
+            vector = self.base.embed_query(text)
+            self.cache.put_many([(key, vector)])
+            return vector
+
+
+def get_local_embeddings(model_name):
+    """Offline sentence-transformers backend."""
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
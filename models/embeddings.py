@@ -1,28 +1,150 @@
-from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from utils.document_loader import load_document
-from config.config import GOOGLE_API_KEY
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-def create_vectorstore(file):
-    text = load_document(file)
+from langchain_core.documents import Document
+from utils.document_loader import ParsedDocument
+from models.embedding_cache import CachedEmbeddings, get_local_embeddings
+from utils.tokens import count_tokens
+from utils.tracing import tracer
+from config.config import (
+    GOOGLE_API_KEY, CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL,
+    EMBEDDING_BACKEND, LOCAL_EMBEDDING_MODEL, EMBEDDING_ID, EMBEDDING_BATCH_SIZE,
+)
 
-    if not text.strip():
-        return "❌ Document is empty or unreadable."
+_embeddings = None
+# Batches embedded while a PDF is still being extracted (see PageEmbedder)
+_stream_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="embed-stream")
+
+def get_embeddings():
+    """Shared, cached embedding model for the configured backend."""
+    global _embeddings
+    if _embeddings is None:
+        if EMBEDDING_BACKEND == "local":
+            base = get_local_embeddings(LOCAL_EMBEDDING_MODEL)
+        else:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+            # ✅ Specify the required model name
+            base = GoogleGenerativeAIEmbeddings(
+                google_api_key=GOOGLE_API_KEY,
+                model=EMBEDDING_MODEL  # Required model name for Gemini embeddings
+            )
+        _embeddings = CachedEmbeddings(base, namespace=EMBEDDING_ID)
+    return _embeddings
+
+def _splitter():
+    # Imported on first use, like FAISS below: neither is needed to start the app
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, add_start_index=True
+    )
+
+def iter_chunks(pages):
+    """Chunk (page_number, text) pairs one page at a time.
+
+    Chunks never span pages, which keeps every chunk citable to a single page.
+    """
+    splitter = _splitter()
+    offset, index = 0, 0
+    for page_number, page_text in pages:
+        if page_text:
+            for chunk in splitter.create_documents([page_text]):
+                chunk.metadata["start_index"] += offset
+                chunk.metadata["chunk"] = index
+                chunk.metadata["tokens"] = count_tokens(chunk.page_content)  # for context packing
+                if page_number is not None:
+                    chunk.metadata["page"] = page_number
+                index += 1
+                yield chunk
+            offset += len(page_text) + 1
+
+class PageEmbedder:
+    """Chunks (page_number, text) pairs as they stream past and embeds each full batch in the
+    background, so embedding the first pages overlaps extracting the rest.
+
+    The chunks are the ones split_document() would produce from the finished document.
+    """
+
+    def __init__(self, batch_size=EMBEDDING_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.chunks = []
+        self._batch = []
+        self._futures = []
+
+    def consume(self, pages):
+        """Yield the pages unchanged (for the parser to join), chunking each on the way through."""
+        passed = deque()
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
-    chunks = splitter.split_text(text)
+        def source():
+            for page in pages:
+                passed.append(page)
+                yield page
 
+        for chunk in iter_chunks(source()):
+            self.chunks.append(chunk)
+            self._batch.append(chunk.page_content)
+            if len(self._batch) >= self.batch_size:
+                self._submit()
+            while passed:
+                yield passed.popleft()
+        if self._batch:
+            self._submit()
+        while passed:  # trailing blank pages
+            yield passed.popleft()
+
+    def _submit(self):
+        self._futures.append(_stream_executor.submit(get_embeddings().embed_documents, self._batch))
+        self._batch = []
+
+    def vectors(self):
+        """Vectors for self.chunks, in order; waits for batches still in flight."""
+        return [vector for future in self._futures for vector in future.result()]
+
+def _document_pages(doc):
+    if not doc.pages:
+        return [(None, doc.text)]
+    return [(page_number, doc.text[start:end]) for page_number, start, end in doc.pages]
+
+def _block_chunks(doc):
+    # Pre-grouped spans (Excel row groups with their header) are already chunk-sized
+    for index, (metadata, start, end) in enumerate(doc.blocks):
+        text = doc.text[start:end]
+        yield Document(
+            page_content=text,
+            metadata={**metadata, "start_index": start, "chunk": index, "tokens": count_tokens(text)},
+        )
+
+def split_document(doc):
+    """Chunk a ParsedDocument into LangChain Documents, tagging each chunk with its page or sheet."""
+    with tracer.span("chunk", doc=doc.name, chars=len(doc.text)) as span:
+        chunks = list(_block_chunks(doc)) if doc.blocks else list(iter_chunks(_document_pages(doc)))
+        span["chunks"] = len(chunks)
+        return chunks
+
+def build_vectorstore(chunks, vectors=None):
+    """FAISS store over `chunks`; `vectors` (e.g. PageEmbedder.vectors) supplies embeddings made ahead."""
     if not chunks:
         return "❌ No chunks could be created from the document."
 
-    # ✅ Specify the required model name
-    embeddings = GoogleGenerativeAIEmbeddings(
-        google_api_key=GOOGLE_API_KEY,
-        model="models/embedding-001"  # Required model name for Gemini embeddings
-    )
+    from models.faiss_index import build_faiss_store
 
     try:
-        return FAISS.from_texts(chunks, embedding=embeddings)
+        with tracer.span("index_build", chunks=len(chunks)) as span:
+            vectorstore = build_faiss_store(
+                [chunk.page_content for chunk in chunks], [chunk.metadata for chunk in chunks], get_embeddings(),
+                vectors=vectors() if vectors else None,
+            )
+            span["index_type"] = type(vectorstore.index).__name__
+            return vectorstore
     except Exception as e:
         return f"❌ Failed to build vectorstore: {e}"
+
+def create_vectorstore(doc):
+    if isinstance(doc, str):
+        doc = ParsedDocument(name="text", file_type="txt", text=doc)
+
+    if not doc.text.strip():
+        return "❌ Document is empty or unreadable."
+
+    return build_vectorstore(split_document(doc))
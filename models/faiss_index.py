@@ -0,0 +1,215 @@
+import math
+import threading
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from config.config import FAISS_INDEX_TYPE, FAISS_FLAT_MAX, FAISS_IVF_MAX, FAISS_NPROBE, FAISS_TRAIN_SAMPLE
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+
+
+def choose_index_type(n_vectors, configured=FAISS_INDEX_TYPE):
+    """Exact search while it is cheap, then IVF, then IVF-PQ once raw vectors stop fitting comfortably in RAM."""
+    if configured != "auto":
+        if configured not in INDEX_TYPES:
+            raise ValueError(f"❌ Unknown FAISS index type: {configured}")
+        return configured
+    if n_vectors <= FAISS_FLAT_MAX:
+        return "flat"
+    if n_vectors <= FAISS_IVF_MAX:
+        return "ivf"
+    return "ivfpq"
+
+
+def _nlist(n_vectors):
+    # ~4*sqrt(n) lists, with enough points per list (FAISS warns below 39) to train on
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39 or 1))
+
+
+def _pq_subquantizers(dim):
+    # More sub-quantizers = better recall and slower training; 64 bytes/vector is the usual ceiling
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2, 1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def create_index(index_type, dim, n_vectors):
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, 32)
+        index.hnsw.efConstruction = 80
+        index.hnsw.efSearch = 128
+        return index
+
+    quantizer = faiss.IndexFlatL2(dim)
+    nlist = _nlist(n_vectors)
+    if index_type == "ivf":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    elif index_type == "ivfpq":
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), 8)
+    else:
+        raise ValueError(f"❌ Unknown FAISS index type: {index_type}")
+    index.nprobe = min(FAISS_NPROBE, nlist)
+    return index
+
+
+def train_index(index, vectors, sample_size=FAISS_TRAIN_SAMPLE, seed=0):
+    """Train on a random sample; flat and HNSW indexes need no training."""
+    if index.is_trained:
+        return
+    if len(vectors) > sample_size:
+        rng = np.random.default_rng(seed)
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    index.train(vectors)
+
+
+def build_faiss_store(texts, metadatas, embedding, index_type=None, ids=None, vectors=None):
+    """Embed once and load a LangChain FAISS store backed by the index type the corpus size calls for.
+
+    Later documents go in with store.add_documents(), which only encodes the new vectors into
+    the already-trained index; no rebuild is needed. Pass `vectors` to skip embedding.
+    """
+    if vectors is None:
+        vectors = embedding.embed_documents(list(texts))
+    vectors = np.asarray(vectors, dtype=np.float32)
+    index_type = index_type or choose_index_type(len(vectors))
+
+    index = create_index(index_type, vectors.shape[1], len(vectors))
+    train_index(index, vectors)
+
+    store = FAISS(
+        embedding_function=embedding,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+    store.add_embeddings(zip(texts, vectors.tolist()), metadatas=list(metadatas), ids=ids)
+    return store
+
+
+class MappedFAISS(FAISS):
+    """FAISS store over a read-only, memory-mapped index file (see IndexStore.load).
+
+    Searches read the mapping directly. The first add or delete swaps in an in-memory copy,
+    since writing through the mapping crashes (flat, HNSW) or raises (IVF).
+    """
+
+    def __init__(self, *args, index_path, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index_path = index_path
+        self._mapped = True
+        self._copy_lock = threading.Lock()
+
+    def _writable(self):
+        with self._copy_lock:
+            if self._mapped:
+                if faiss.try_extract_index_ivf(self.index) is None:
+                    self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+                else:  # on-disk inverted lists can't be serialized or cloned; read them in
+                    self.index = faiss.read_index(self.index_path)
+                self._mapped = False
+
+    def add_texts(self, *args, **kwargs):
+        self._writable()
+        return super().add_texts(*args, **kwargs)
+
+    async def aadd_texts(self, *args, **kwargs):
+        self._writable()
+        return await super().aadd_texts(*args, **kwargs)
+
+    def add_embeddings(self, *args, **kwargs):
+        self._writable()
+        return super().add_embeddings(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._writable()
+        return super().delete(*args, **kwargs)
+
+    def merge_from(self, *args, **kwargs):
+        self._writable()
+        return super().merge_from(*args, **kwargs)
+
+
+def stored_vectors(store):
+    """Every vector in the store's index, in position order, or None when the index only holds
+    lossy (product-quantized) codes."""
+    index = store.index
+    if isinstance(index, faiss.IndexIVFPQ):
+        return None
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def delete_from_store(store, ids):
+    """store.delete(ids) for flat indexes, whose remove_ids shifts later vectors down just as
+    LangChain renumbers its docstore mapping. HNSW cannot remove vectors, so its graph is rebuilt
+    from the remaining ones; IVF keeps the survivors' old ids, so they are renumbered in place.
+    Either way vector ids stay equal to docstore positions."""
+    if not isinstance(store.index, (faiss.IndexHNSW, faiss.IndexIVF)):
+        return store.delete(ids)
+    if isinstance(store, MappedFAISS):
+        store._writable()
+
+    removed = set(ids)
+    keep = [p for p in range(store.index.ntotal) if store.index_to_docstore_id[p] not in removed]
+    if isinstance(store.index, faiss.IndexHNSW):
+        vectors = store.index.reconstruct_n(0, store.index.ntotal)[keep]
+        index = create_index("hnsw", store.index.d, len(keep))
+        index.add(vectors)
+        store.index = index
+    else:
+        _remove_from_ivf(store.index, keep)
+
+    present = removed & set(store.index_to_docstore_id.values())
+    if present:
+        store.docstore.delete(list(present))
+    store.index_to_docstore_id = {new: store.index_to_docstore_id[old] for new, old in enumerate(keep)}
+    return True
+
+
+def _remove_from_ivf(index, keep):
+    """Drop every id not in `keep` (sorted) and renumber the survivors 0..len(keep)-1."""
+    direct_map = index.direct_map.type != faiss.DirectMap.NoMap
+    index.set_direct_map_type(faiss.DirectMap.NoMap)  # remove_ids refuses array direct maps
+    kept = set(keep)
+    index.remove_ids(np.array([p for p in range(index.ntotal) if p not in kept], dtype=np.int64))
+
+    renumber = np.full(max(keep, default=0) + 1, -1, dtype=np.int64)
+    renumber[keep] = np.arange(len(keep))
+    invlists = index.invlists
+    for list_no in range(index.nlist):
+        size = invlists.list_size(list_no)
+        if size:
+            old_ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), size)
+            new_ids = renumber[old_ids]
+            codes = faiss.rev_swig_ptr(invlists.get_codes(list_no), size * invlists.code_size).copy()
+            invlists.update_entries(list_no, 0, size, faiss.swig_ptr(new_ids), faiss.swig_ptr(codes))
+    if direct_map:
+        index.make_direct_map()
+
+
+def upgrade_index(store, index_type=None):
+    """Move a grown store to a larger-scale index type without re-embedding.
+
+    Vectors are reconstructed from the current index, so this only works from flat/HNSW/IVF-flat
+    (lossless) indexes; positions and docstore ids are preserved.
+    """
+    n = store.index.ntotal
+    index_type = index_type or choose_index_type(n)
+    if n == 0 or index_type == "flat":
+        return store
+
+    if isinstance(store.index, faiss.IndexIVF):
+        store.index.make_direct_map()
+    vectors = store.index.reconstruct_n(0, n)
+    index = create_index(index_type, vectors.shape[1], n)
+    train_index(index, vectors)
+    index.add(vectors)
+    store.index = index
+    return store
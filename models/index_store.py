@@ -0,0 +1,158 @@
+import json
+import os
+import pickle
+import shutil
+import threading
+
+from config.config import INDEX_STORE_DIR, INDEX_STORE_MAX_MB
+from utils.tracing import tracer
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+SPARSE_FILE = "bm25.pkl"
+
+
+def _mmap_flag(index_path):
+    import faiss
+
+    # IO_FLAG_MMAP only maps IVF inverted lists; flat codes (IndexFlat, HNSW storage) are copied
+    # into memory unless read with IO_FLAG_MMAP_IFC. The header fourcc tells the two apart.
+    with open(index_path, "rb") as f:
+        fourcc = f.read(4)
+    return faiss.IO_FLAG_MMAP if fourcc.startswith(b"Iw") else faiss.IO_FLAG_MMAP_IFC
+
+
+class IndexStore:
+    """FAISS indexes persisted on disk by document hash, evicted least-recently-used past a size cap."""
+
+    def __init__(self, root=INDEX_STORE_DIR, max_bytes=INDEX_STORE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        path = self._path(key)
+        return os.path.exists(os.path.join(path, INDEX_FILE)) and os.path.exists(os.path.join(path, DOCSTORE_FILE))
+
+    def save(self, key, vectorstore, sparse_index=None):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        import faiss  # FAISS and its LangChain wrapper load on first save/load, not at app start
+
+        faiss.write_index(vectorstore.index, os.path.join(tmp_path, INDEX_FILE))
+        with open(os.path.join(tmp_path, DOCSTORE_FILE), "wb") as f:
+            pickle.dump((vectorstore.docstore, vectorstore.index_to_docstore_id), f)
+        if sparse_index is not None:
+            with open(os.path.join(tmp_path, SPARSE_FILE), "wb") as f:
+                pickle.dump(sparse_index, f)
+
+        with self._lock:
+            # Rename into place so concurrent readers never see a half-written index
+            if os.path.exists(path):
+                shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+            self._evict(keep=key)
+
+    def load(self, key, embeddings):
+        """Reload a stored index without re-embedding; None if the key is unknown."""
+        with tracer.span("index_load", doc_key=key) as span:
+            span["cache_hit"] = self.exists(key)
+            return self._load(key, embeddings) if span["cache_hit"] else None
+
+    def _load(self, key, embeddings):
+        import faiss
+        from langchain_community.vectorstores import FAISS
+
+        from models.faiss_index import MappedFAISS
+
+        path = self._path(key)
+        index_path = os.path.join(path, INDEX_FILE)
+        with open(os.path.join(path, DOCSTORE_FILE), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        os.utime(path)  # mark as recently used for eviction
+
+        try:
+            index = faiss.read_index(index_path, _mmap_flag(index_path) | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            # Index types without mmap support are read into memory instead
+            index = faiss.read_index(index_path)
+            return FAISS(embedding_function=embeddings, index=index, docstore=docstore,
+                         index_to_docstore_id=index_to_docstore_id)
+        # Mapped indexes are read-only; the store copies the index into memory before any write
+        return MappedFAISS(embedding_function=embeddings, index=index, docstore=docstore,
+                           index_to_docstore_id=index_to_docstore_id, index_path=index_path)
+
+    def load_sparse_index(self, key):
+        """The BM25 index stored next to the FAISS index, or None."""
+        path = os.path.join(self._path(key), SPARSE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def load_artifacts(self, key):
+        """Summaries / metrics saved for a document (by the app or a batch job)."""
+        path = os.path.join(self.root, f"{key}.json")
+        if not os.path.exists(path):
+            return {"summaries": {}, "metrics": {}}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_artifacts(self, key, summaries=None, metrics=None):
+        """Merge per-provider summaries/metrics into the document's artifact file."""
+        with self._lock:
+            artifacts = self.load_artifacts(key)
+            artifacts["summaries"].update(summaries or {})
+            artifacts["metrics"].update(metrics or {})
+            tmp_path = os.path.join(self.root, f"{key}.json.tmp-{os.getpid()}-{threading.get_ident()}")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(artifacts, f, ensure_ascii=False)
+            os.replace(tmp_path, os.path.join(self.root, f"{key}.json"))
+
+    def delete(self, key):
+        shutil.rmtree(self._path(key), ignore_errors=True)
+        artifact_path = os.path.join(self.root, f"{key}.json")
+        if os.path.exists(artifact_path):
+            os.remove(artifact_path)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path) or ".tmp-" in name:
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(dirpath, f))
+                for dirpath, _, files in os.walk(path) for f in files
+            )
+            entries.append((os.path.getmtime(path), name, size))
+        return sorted(entries)
+
+    def _evict(self, keep=None):
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        for _, name, size in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            self.delete(name)
+            total -= size
+
+    def total_bytes(self):
+        return sum(size for _, _, size in self._entries())
+
+
+_store = None
+
+
+def get_index_store():
+    global _store
+    if _store is None:
+        _store = IndexStore()
+    return _store
@@ -1,23 +1,80 @@
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
-from langchain_google_genai import ChatGoogleGenerativeAI
+import threading
+
 from config.config import *
 
-def get_chat_model(provider="openai", temperature=0.5):
-    if not isinstance(provider, str):
-        raise ValueError(f"❌ Provider must be a string, got: {type(provider)}")
+DEFAULT_MODELS = {
+    "openai": None,  # ChatOpenAI's own default
+    "groq": "llama3-8b-8192",  # ✅ Use the lighter and stable Groq model
+    "google": "gemini-pro",
+}
 
-    provider = provider.lower()
+# Long-lived clients keyed by (provider, model, temperature). Each client keeps its own
+# HTTP connection pool, so reusing it skips connection setup and TLS handshakes.
+_clients = {}
+_clients_lock = threading.Lock()
+_pool_stats = {"created": 0, "reused": 0}
 
+def _create_chat_model(provider, model, temperature):
+    # Provider SDKs are imported on first use: each costs seconds, and a session only needs one
     if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        if model:
+            return ChatOpenAI(api_key=OPENAI_API_KEY, model=model, temperature=temperature)
         return ChatOpenAI(api_key=OPENAI_API_KEY, temperature=temperature)
-    
+
     elif provider == "groq":
-        # ✅ Use the lighter and stable Groq model
-        return ChatGroq(api_key=GROQ_API_KEY, model="llama3-8b-8192", temperature=temperature)
-    
+        from langchain_groq import ChatGroq
+        return ChatGroq(api_key=GROQ_API_KEY, model=model, temperature=temperature)
+
     elif provider == "google":
-        return ChatGoogleGenerativeAI(google_api_key=GOOGLE_API_KEY, model="gemini-pro", temperature=temperature)
-    
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(google_api_key=GOOGLE_API_KEY, model=model, temperature=temperature)
+
     else:
         raise ValueError(f"❌ Unknown provider: {provider}")
+
+def get_chat_model(provider="openai", temperature=0.5, model=None):
+    if not isinstance(provider, str):
+        raise ValueError(f"❌ Provider must be a string, got: {type(provider)}")
+
+    provider = provider.lower()
+    if provider not in DEFAULT_MODELS:
+        raise ValueError(f"❌ Unknown provider: {provider}")
+
+    model = model or DEFAULT_MODELS[provider]
+    key = (provider, model, round(float(temperature), 2))
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is not None:
+            _pool_stats["reused"] += 1
+            return client
+
+    # Built outside the lock: a first SDK import takes seconds and must not stall other sessions.
+    # Two sessions racing on the same key both build one; the first to insert wins.
+    created = _create_chat_model(provider, model, key[2])
+    with _clients_lock:
+        client = _clients.setdefault(key, created)
+        _pool_stats["created" if client is created else "reused"] += 1
+        return client
+
+def get_model_name(provider):
+    return DEFAULT_MODELS.get(provider.lower()) or provider
+
+def provider_name(model):
+    """Provider a pooled client was created for (used to label traces)."""
+    with _clients_lock:
+        for (provider, _, _), client in _clients.items():
+            if client is model:
+                return provider
+    return type(model).__name__
+
+def get_pool_stats():
+    """Client reuse counters for the chat model registry."""
+    with _clients_lock:
+        total = _pool_stats["created"] + _pool_stats["reused"]
+        return {
+            **_pool_stats,
+            "clients": len(_clients),
+            "reuse_rate": _pool_stats["reused"] / total if total else 0.0,
+        }
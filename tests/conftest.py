@@ -0,0 +1,60 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Tests import the app's packages (config, models, utils, benchmarks) from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tracing import tracer  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_trace_file():
+    # Spans still run, but tests never append to the app's .cache/traces.jsonl
+    path, tracer.path = tracer.path, None
+    yield
+    tracer.path = path
+
+
+class LocalServer:
+    """Threaded HTTP server on localhost; `routes` maps a path to handler(request) -> (status, headers, body)."""
+
+    def __init__(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                server.requests.append((path, dict(self.headers), parse_qs(urlparse(self.path).query)))
+                status, headers, body = server.routes.get(path, lambda request: (404, {}, b"not found"))(self)
+                self.send_response(status)
+                for name, value in {"Content-Length": str(len(body)), **headers}.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client timed out first
+
+            def log_message(self, *args):
+                pass
+
+        self.routes, self.requests = {}, []
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def hits(self, path):
+        return sum(1 for requested, _, _ in self.requests if requested == path)
+
+
+@pytest.fixture
+def local_server():
+    server = LocalServer()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
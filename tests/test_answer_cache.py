@@ -0,0 +1,76 @@
+import re
+import zlib
+
+import utils.answer_cache as answer_cache_module
+from utils.answer_cache import AnswerCache
+
+SCOPE = ("fy2024", "groq", "llama3-8b-8192", "Concise|[]")
+
+
+class WordEmbedder:
+    """Bag of alphabetic words: questions differing only in figures embed identically."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        words = re.findall(r"[a-z]+", text.lower())
+        return [float(sum(1 for w in words if zlib.crc32(w.encode()) % 16 == i)) for i in range(16)]
+
+
+def test_exact_repeats_hit_after_normalization():
+    cache = AnswerCache()
+    cache.store(*SCOPE, "What was the net profit?", "Rs 410 Cr", ["p. 2"])
+
+    assert cache.lookup(*SCOPE, "  what was the NET profit ") == ("Rs 410 Cr", ["p. 2"])
+    assert cache.lookup("fy2023", *SCOPE[1:], "What was the net profit?") is None  # other document
+
+
+def test_entries_expire(monkeypatch):
+    cache = AnswerCache(ttl=60)
+    cache.store(*SCOPE, "net profit", "Rs 410 Cr", [])
+    now = answer_cache_module.time.time()
+    monkeypatch.setattr(answer_cache_module.time, "time", lambda: now + 61)
+
+    assert cache.lookup(*SCOPE, "net profit") is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.store(*SCOPE, "revenue", "a", [])
+    cache.store(*SCOPE, "ebitda", "b", [])
+    cache.lookup(*SCOPE, "revenue")
+    cache.store(*SCOPE, "roce", "c", [])
+
+    assert cache.lookup(*SCOPE, "ebitda") is None
+    assert cache.lookup(*SCOPE, "revenue") and cache.lookup(*SCOPE, "roce")
+
+
+def test_near_duplicates_hit_only_when_figures_and_periods_match():
+    cache = AnswerCache(embed_fn=WordEmbedder(), threshold=0.95)
+    cache.store(*SCOPE, "What was net profit in FY2023?", "Rs 380 Cr", [])
+
+    assert cache.lookup(*SCOPE, "In FY2023, what was net profit?") == ("Rs 380 Cr", [])
+    assert cache.lookup(*SCOPE, "What was net profit in FY2024?") is None
+    assert cache.lookup(*SCOPE, "What was net profit in the last quarter?") is None
+    assert cache.stats == {"hits": 0, "semantic_hits": 1, "misses": 2}
+
+
+def test_a_missed_question_is_embedded_once():
+    embedder = WordEmbedder()
+    cache = AnswerCache(embed_fn=embedder)
+
+    assert cache.lookup(*SCOPE, "What was EBITDA?") is None
+    cache.store(*SCOPE, "What was EBITDA?", "Rs 900 Cr", [])
+
+    assert embedder.calls == ["What was EBITDA?"]
+
+
+def test_bypass_skips_the_lookup_but_not_the_store():
+    cache = AnswerCache()
+    cache.store(*SCOPE, "revenue", "old", [])
+
+    assert cache.lookup(*SCOPE, "revenue", bypass=True) is None
+    cache.store(*SCOPE, "revenue", "fresh", [])
+    assert cache.lookup(*SCOPE, "revenue") == ("fresh", [])
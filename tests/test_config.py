@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_cache_paths_do_not_depend_on_the_working_directory(tmp_path):
+    code = ("import sys; sys.path.insert(0, sys.argv[1]); from config import config as c; "
+            "print(c.INDEX_STORE_DIR, c.EMBEDDING_CACHE_PATH, c.FETCH_CACHE_DIR, c.TRACE_PATH)")
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("CACHE_DIR", "INDEX_STORE_DIR", "EMBEDDING_CACHE_PATH", "FETCH_CACHE_DIR", "TRACE_PATH")}
+
+    result = subprocess.run([sys.executable, "-c", code, ROOT], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, check=True)
+
+    paths = result.stdout.split()
+    assert len(paths) == 4
+    assert all(path.startswith(os.path.join(ROOT, ".cache")) for path in paths)
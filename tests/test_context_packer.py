@@ -0,0 +1,29 @@
+from langchain_core.documents import Document
+
+from utils.context_packer import pack_context
+
+TEXT = "".join(f"word{i} " for i in range(600))
+
+
+def chunk(index, size=778, step=692, tokens=100):
+    start = index * step
+    return Document(page_content=TEXT[start:start + size],
+                    metadata={"doc_id": "fy2024", "source": "report.pdf", "start_index": start, "tokens": tokens})
+
+
+def test_a_chunk_bridging_two_spans_folds_them_into_one():
+    chunks = [chunk(i) for i in range(3)]
+
+    packed = pack_context([chunks[2], chunks[0], chunks[1]], budget=10_000)
+
+    assert len(packed) == 1
+    assert packed[0].page_content == TEXT[:2 * 692 + 778]  # no overlap sent twice
+    assert packed[0].metadata["start_index"] == 0
+    assert packed[0].metadata["tokens"] < 300
+
+
+def test_separate_documents_are_not_merged():
+    first, second = chunk(0), chunk(1)
+    second.metadata["doc_id"] = "fy2023"
+
+    assert len(pack_context([first, second], budget=10_000)) == 2
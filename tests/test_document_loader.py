@@ -0,0 +1,75 @@
+from io import BytesIO
+
+import pytest
+
+import models.embeddings as embeddings_module
+import utils.pipeline as pipeline
+from benchmarks.fakes import HashingEmbeddings
+from benchmarks.synthetic import make_pdf
+from models.embeddings import PageEmbedder, split_document
+from models.index_store import IndexStore
+from utils.document_loader import iter_pdf_pages, parse_document
+
+
+def pdf_file(pages):
+    file = BytesIO(make_pdf(pages, lines_per_page=20))
+    file.name = "annual-report.pdf"
+    return file
+
+
+def test_process_pool_extraction_matches_serial_extraction():
+    file = pdf_file(30)
+
+    parallel = list(iter_pdf_pages(file, workers=2, pages_per_task=4))
+    serial = list(iter_pdf_pages(file, workers=1))
+
+    assert [number for number, _ in parallel] == list(range(1, 31))
+    assert parallel == serial
+
+
+class ExtractionAwareEmbeddings(HashingEmbeddings):
+    """Records how many pages had been extracted when each batch was embedded."""
+
+    def __init__(self, extracted):
+        super().__init__(dim=32)
+        self.extracted = extracted
+        self.seen_at = []
+
+    def embed_documents(self, texts):
+        self.seen_at.append(len(self.extracted))
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def streaming(monkeypatch, tmp_path):
+    extracted = []
+    embeddings = ExtractionAwareEmbeddings(extracted)
+    monkeypatch.setattr(embeddings_module, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(pipeline, "get_index_store", lambda: IndexStore(str(tmp_path)))
+
+    def pages(file, **kwargs):
+        for page in iter_pdf_pages(file, workers=1):
+            extracted.append(page[0])
+            yield page
+
+    monkeypatch.setattr("utils.document_loader.iter_pdf_pages", pages)
+    return embeddings
+
+
+def test_pdf_chunks_are_embedded_while_later_pages_are_extracted(monkeypatch, streaming):
+    monkeypatch.setattr(pipeline, "PageEmbedder", lambda: PageEmbedder(batch_size=8))
+
+    parsed, chunks, vectors = pipeline.parse_and_chunk(pdf_file(12), "report")
+
+    assert vectors() == HashingEmbeddings(dim=32).embed_documents([chunk.page_content for chunk in chunks])
+    assert [(c.page_content, c.metadata) for c in chunks] == [(c.page_content, c.metadata) for c in split_document(parsed)]
+    assert min(streaming.seen_at) < 12  # the first batch went out before the last page was extracted
+
+
+def test_other_formats_are_chunked_after_parsing(streaming):
+    file = BytesIO(b"Revenue from operations: Rs 5,400 Cr\n" * 50)
+    file.name = "notes.txt"
+
+    parsed, chunks, vectors = pipeline.parse_and_chunk(file, "notes")
+
+    assert vectors is None and chunks and parse_document(file).text == parsed.text
@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+import models.embedding_cache as embedding_cache
+from benchmarks.fakes import HashingEmbeddings
+from models.embedding_cache import CachedEmbeddings, VectorCache
+
+
+class RecordingEmbeddings(HashingEmbeddings):
+    """Fake provider that records every batch it is sent and fails the first `failures` calls."""
+
+    def __init__(self, failures=0):
+        super().__init__(dim=32)
+        self.batches = []
+        self.queries = []
+        self.failures = failures
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("429 Too Many Requests")
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+def cached(base, cache=None, namespace="fake:test", **kwargs):
+    kwargs.setdefault("backoff", 0)
+    return CachedEmbeddings(base, namespace=namespace, cache=cache or VectorCache(":memory:"), **kwargs)
+
+
+def test_duplicate_texts_are_embedded_once():
+    base = RecordingEmbeddings()
+    embeddings = cached(base)
+
+    vectors = embeddings.embed_documents(["revenue", "profit", "revenue", "revenue"])
+
+    assert base.batches == [["revenue", "profit"]]
+    assert vectors[0] == vectors[2] == vectors[3] != vectors[1]
+    assert vectors == base.embed_documents(["revenue", "profit", "revenue", "revenue"])
+
+
+def test_repeats_are_served_from_the_vector_cache():
+    base = RecordingEmbeddings()
+    embeddings = cached(base)
+
+    first = embeddings.embed_documents(["a b c", "d e f"])
+    second = embeddings.embed_documents(["d e f", "a b c"])
+
+    assert second == first[::-1]
+    assert embeddings.stats == {"hits": 2, "misses": 2, "provider_calls": 1}
+
+
+def test_cache_is_shared_between_wrappers():
+    cache = VectorCache(":memory:")
+    cached(RecordingEmbeddings(), cache).embed_documents(["shared boilerplate"])
+
+    base = RecordingEmbeddings()
+    cached(base, cache).embed_documents(["shared boilerplate", "new text"])
+
+    assert base.batches == [["new text"]]
+
+
+def test_misses_are_sent_in_batches():
+    base = RecordingEmbeddings()
+    embeddings = cached(base, batch_size=4, max_workers=3)
+    texts = [f"chunk {i}" for i in range(10)]
+
+    vectors = embeddings.embed_documents(texts)
+
+    assert sorted(len(batch) for batch in base.batches) == [2, 4, 4]
+    assert embeddings.stats["provider_calls"] == 3
+    assert vectors == HashingEmbeddings(dim=32).embed_documents(texts)  # order survives concurrency
+
+
+def test_transient_failures_are_retried_with_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(embedding_cache.time, "sleep", sleeps.append)
+    base = RecordingEmbeddings(failures=2)
+    embeddings = cached(base, max_retries=3, backoff=0.5)
+
+    vectors = embeddings.embed_documents(["x", "y"])
+
+    assert len(vectors) == 2
+    assert embeddings.stats["provider_calls"] == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_gives_up_after_max_retries_and_caches_nothing():
+    cache = VectorCache(":memory:")
+    embeddings = cached(RecordingEmbeddings(failures=5), cache, max_retries=1)
+
+    with pytest.raises(RuntimeError):
+        embeddings.embed_documents(["x"])
+
+    assert embeddings.stats["provider_calls"] == 2
+    assert cache.get_many([embeddings._key("x")]) == {}
+
+
+def test_namespaces_do_not_share_vectors():
+    cache = VectorCache(":memory:")
+    cached(RecordingEmbeddings(), cache, namespace="google:embedding-001").embed_documents(["text"])
+
+    base = RecordingEmbeddings()
+    cached(base, cache, namespace="local:all-MiniLM-L6-v2").embed_documents(["text"])
+
+    assert base.batches == [["text"]]
+
+
+def test_queries_are_cached_separately_from_documents():
+    base = RecordingEmbeddings()
+    embeddings = cached(base)
+    embeddings.embed_documents(["net profit"])
+
+    embeddings.embed_query("net profit")
+    embeddings.embed_query("net profit")
+
+    assert base.queries == ["net profit"]
+    assert embeddings.stats["hits"] == 1
+
+
+def test_stats_are_exact_under_concurrent_callers():
+    embeddings = cached(RecordingEmbeddings())
+    embeddings.embed_documents(["warm"])
+
+    threads = [threading.Thread(target=lambda: [embeddings.embed_query("warm") for _ in range(200)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert embeddings.stats["hits"] + embeddings.stats["misses"] == 1 + 8 * 200
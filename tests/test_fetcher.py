@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import utils.fetcher as fetcher
+from utils.fetcher import _FetchCache, fetch_document
+
+PDF = b"%PDF-1.4\n" + b"0" * 4096 + b"\n%%EOF\n"
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = _FetchCache(str(tmp_path))
+    monkeypatch.setattr(fetcher, "_cache", cache)
+    return cache
+
+
+def pdf_with_etag(etag='"v1"'):
+    def handler(request):
+        if request.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "application/octet-stream"}, PDF
+    return handler
+
+
+def test_refetch_is_a_conditional_get_served_from_the_cache(cache, local_server):
+    local_server.routes["/report.pdf"] = pdf_with_etag()
+
+    first = fetch_document(f"{local_server.url}/report.pdf")
+    second = fetch_document(f"{local_server.url}/report.pdf")
+
+    assert first.name == "report.pdf" and not first.not_modified
+    assert second.not_modified and second.read() == PDF
+    assert second.doc_key == first.doc_key
+    assert local_server.requests[1][1]["If-None-Match"] == '"v1"'
+
+
+def test_documents_over_the_size_cap_are_rejected(cache, local_server):
+    local_server.routes["/big.pdf"] = pdf_with_etag()
+
+    result = fetch_document(f"{local_server.url}/big.pdf", max_bytes=1024)
+
+    assert result.startswith("❌") and "limit" in result
+    assert cache.get(f"{local_server.url}/big.pdf") is None
+
+
+def test_html_pages_are_rejected(cache, local_server):
+    local_server.routes["/login"] = lambda request: (200, {"Content-Type": "text/html"},
+                                                      b"<!DOCTYPE html><html><body>Sign in</body></html>")
+
+    assert fetch_document(f"{local_server.url}/login").startswith("❌ Unsupported")
+
+
+def test_missing_documents_report_the_status(cache, local_server):
+    assert fetch_document(f"{local_server.url}/missing.pdf") == (
+        "❌ Failed to fetch the document (HTTP 404). Check the URL.")
+
+
+def test_cache_evicts_least_recently_used_past_its_cap(monkeypatch, tmp_path, local_server):
+    cache = _FetchCache(str(tmp_path), max_bytes=2 * len(PDF) + 100)
+    monkeypatch.setattr(fetcher, "_cache", cache)
+    for name in ("a", "b", "c"):
+        local_server.routes[f"/{name}.pdf"] = pdf_with_etag()
+
+    fetch_document(f"{local_server.url}/a.pdf")
+    fetch_document(f"{local_server.url}/b.pdf")
+    os.utime(cache._paths(f"{local_server.url}/a.pdf")[1], (0, 0))
+    os.utime(cache._paths(f"{local_server.url}/b.pdf")[1], (1, 1))
+    fetch_document(f"{local_server.url}/a.pdf")  # the 304 marks a as recently used
+    fetch_document(f"{local_server.url}/c.pdf")
+
+    assert cache.get(f"{local_server.url}/b.pdf") is None
+    assert cache.get(f"{local_server.url}/a.pdf") and cache.get(f"{local_server.url}/c.pdf")
+    assert cache.total_bytes() <= cache.max_bytes
@@ -0,0 +1,44 @@
+import pytest
+
+from benchmarks.fakes import HashingEmbeddings
+from models.faiss_index import MappedFAISS, build_faiss_store
+from models.index_store import IndexStore
+
+TEXTS = [f"note {i}: inventory and receivables for segment {i}" for i in range(300)]
+
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddings(dim=32)
+
+
+def saved(tmp_path, embeddings, index_type):
+    store = IndexStore(str(tmp_path))
+    vectorstore = build_faiss_store(TEXTS, [{"chunk": i} for i in range(len(TEXTS))], embeddings,
+                                    index_type=index_type, ids=[f"doc:{i}" for i in range(len(TEXTS))])
+    store.save("doc", vectorstore)
+    return store
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf"])
+def test_loaded_indexes_are_copied_before_adds(tmp_path, embeddings, index_type):
+    store = saved(tmp_path, embeddings, index_type)
+    loaded = store.load("doc", embeddings)
+    assert isinstance(loaded, MappedFAISS)
+
+    loaded.add_texts(["deferred tax assets rose"], ids=["extra:0"])
+
+    assert loaded.index.ntotal == len(TEXTS) + 1
+    assert loaded.similarity_search("deferred tax assets rose", k=1)[0].page_content == "deferred tax assets rose"
+    assert store.load("doc", embeddings).index.ntotal == len(TEXTS)  # the file on disk is untouched
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf"])  # HNSW deletes rebuild (delete_from_store)
+def test_loaded_indexes_are_copied_before_deletes(tmp_path, embeddings, index_type):
+    store = saved(tmp_path, embeddings, index_type)
+    loaded = store.load("doc", embeddings)
+
+    loaded.delete(["doc:0", "doc:1"])
+
+    assert loaded.index.ntotal == len(TEXTS) - 2
+    assert store.load("doc", embeddings).index.ntotal == len(TEXTS)
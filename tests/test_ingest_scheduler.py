@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+import utils.ingest_scheduler as scheduler
+from models.index_store import IndexStore
+from utils.document_loader import ParsedDocument
+from utils.ingest_cache import IngestEntry
+
+
+@pytest.fixture
+def entry(monkeypatch, tmp_path):
+    store = IndexStore(str(tmp_path))
+    monkeypatch.setattr(scheduler, "get_index_store", lambda: store)
+    monkeypatch.setattr(scheduler, "ensure_index", lambda key, chunks, vectors: ("vectorstore", "bm25"))
+    document = ParsedDocument(name="report.txt", file_type="txt", text="Revenue: Rs 150 Cr")
+    return IngestEntry(key=f"doc-{time.monotonic_ns()}", document=document)
+
+
+def wait(entry):
+    deadline = time.monotonic() + 5
+    while scheduler.is_pending(entry):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def cut_off_stream(doc, model_provider):
+    yield "Revenue grew 12%."
+    raise ConnectionResetError("connection reset by peer")
+
+
+def test_failures_are_kept_out_of_the_results_and_retried(monkeypatch, entry):
+    replies = iter([cut_off_stream, lambda doc, model_provider: iter(["A healthy quarter."])])
+    monkeypatch.setattr(scheduler, "stream_summary", lambda doc, model_provider: next(replies)(doc, model_provider))
+    monkeypatch.setattr(scheduler, "extract_financial_metrics", lambda doc, model_provider: "Revenue: Rs 150 Cr")
+    monkeypatch.setattr(scheduler, "INGEST_RETRY_SECONDS", 0)
+
+    scheduler.schedule_ingestion(entry, "groq")
+    wait(entry)
+    assert "groq" not in entry.summaries and "groq" not in entry.partial_summaries
+    assert "groq" not in scheduler.get_index_store().load_artifacts(entry.key)["summaries"]
+    assert entry.errors == {"summary:groq": "⚠️ Failed to generate summary: connection reset by peer"}
+    assert entry.metrics == {"groq": "Revenue: Rs 150 Cr"}
+    assert entry.vectorstore == "vectorstore"
+
+    scheduler.schedule_ingestion(entry, "groq")
+    wait(entry)
+    assert entry.summaries == {"groq": "A healthy quarter."}
+    assert entry.errors == {}
+
+
+def test_failed_tasks_wait_before_retrying(monkeypatch, entry):
+    calls = []
+
+    def failing_metrics(doc, model_provider):
+        calls.append(model_provider)
+        raise RuntimeError("timeout")
+
+    monkeypatch.setattr(scheduler, "stream_summary", lambda doc, model_provider: iter(["Summary."]))
+    monkeypatch.setattr(scheduler, "extract_financial_metrics", failing_metrics)
+    monkeypatch.setattr(scheduler, "INGEST_RETRY_SECONDS", 60)
+
+    scheduler.schedule_ingestion(entry, "groq")
+    wait(entry)
+    scheduler.schedule_ingestion(entry, "groq")  # e.g. the UI's polling rerun
+    wait(entry)
+
+    assert calls == ["groq"]
+    assert entry.errors == {"metrics:groq": "❌ metrics:groq failed: timeout"}
+    assert "groq" not in entry.metrics
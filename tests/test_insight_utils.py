@@ -0,0 +1,51 @@
+import utils.insight_utils as insight_utils
+from benchmarks.fakes import FakeChatModel
+
+
+class EchoChatModel(FakeChatModel):
+    """Replies with the user message it was sent: summaries that never get shorter."""
+
+    def invoke(self, messages, **kwargs):
+        self.reply = messages[-1]["content"]
+        return super().invoke(messages, **kwargs)
+
+
+def test_reduce_stops_when_summaries_do_not_shrink(monkeypatch):
+    model = EchoChatModel()
+    monkeypatch.setattr(insight_utils, "get_chat_model", lambda **kwargs: model)
+    monkeypatch.setattr(insight_utils, "SECTION_TOKENS", 200)
+    monkeypatch.setattr(insight_utils, "_section_cache", insight_utils._SectionCache())
+    summaries = [f"Section {i}: revenue rose in segment {i} " * 12 for i in range(12)]
+
+    combined = insight_utils._reduce_input(summaries, "groq")
+
+    assert "Section 11" in combined
+    assert model.calls <= len(summaries) * insight_utils.MAX_REDUCE_ROUNDS
+
+
+def test_a_summary_cut_off_mid_stream_is_reported_as_a_failure(monkeypatch):
+    class CutOffChatModel(FakeChatModel):
+        def stream(self, messages, **kwargs):
+            yield from list(super().stream(messages, **kwargs))[:2]
+            raise ConnectionResetError("connection reset by peer")
+
+    monkeypatch.setattr(insight_utils, "get_chat_model", lambda **kwargs: CutOffChatModel())
+
+    assert insight_utils.generate_summary("Revenue rose 12%.") == (
+        "⚠️ Failed to generate summary: connection reset by peer")
+
+
+def test_summaries_use_the_selected_provider(monkeypatch):
+    providers = []
+
+    def chat_model(provider, **kwargs):
+        providers.append(provider)
+        return FakeChatModel(reply="A steady year.")
+
+    monkeypatch.setattr(insight_utils, "get_chat_model", chat_model)
+    monkeypatch.setattr(insight_utils, "SECTION_TOKENS", 200)
+    monkeypatch.setattr(insight_utils, "_section_cache", insight_utils._SectionCache())
+
+    insight_utils.generate_summary("Revenue rose 12% on volume growth. " * 80, model_provider="google")
+
+    assert providers and set(providers) == {"google"}
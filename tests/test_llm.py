@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+import models.llm as llm
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(llm, "_clients", {})
+    monkeypatch.setattr(llm, "_pool_stats", {"created": 0, "reused": 0})
+
+
+def test_clients_are_pooled_per_provider_model_and_temperature(monkeypatch, pool):
+    monkeypatch.setattr(llm, "_create_chat_model", lambda provider, model, temperature: object())
+
+    first = llm.get_chat_model("groq", temperature=0.5)
+
+    assert llm.get_chat_model("GROQ", temperature=0.5) is first
+    assert llm.get_chat_model("groq", temperature=0.2) is not first
+    assert llm.get_pool_stats()["created"] == 2 and llm.get_pool_stats()["reused"] == 1
+
+
+def test_a_slow_client_build_does_not_block_pooled_clients(monkeypatch, pool):
+    release = threading.Event()
+
+    def create(provider, model, temperature):
+        if provider == "google":
+            release.wait(5)  # e.g. the first import of the provider SDK
+        return object()
+
+    monkeypatch.setattr(llm, "_create_chat_model", create)
+    groq = llm.get_chat_model("groq")
+    slow = threading.Thread(target=llm.get_chat_model, args=("google",))
+    slow.start()
+
+    try:
+        finished = threading.Event()
+        threading.Thread(target=lambda: (llm.get_chat_model("groq"), finished.set())).start()
+        assert finished.wait(1)
+    finally:
+        release.set()
+        slow.join()
+    assert llm.get_chat_model("groq") is groq
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from utils.document_loader import ParsedDocument
+from utils.metric_extractor import extract_metrics
+
+
+def sheet(data, name="P&L"):
+    table = pd.DataFrame(data)
+    table.attrs["sheet"] = name
+    return table
+
+
+def test_numeric_columns_skip_dates_and_text():
+    table = sheet({
+        "Particulars": ["Revenue", "EBITDA"],
+        "FY2024": [5400.0, 900.0],
+        "Reported on": pd.to_datetime(["2024-05-20", "2024-05-20"]),
+    })
+    doc = ParsedDocument(name="pl.xlsx", file_type="xlsx", text="P&L", tables=[table])
+
+    assert list(doc.numeric_columns()["P&L"]) == ["FY2024"]
+
+
+def test_table_metrics_use_typed_values_and_sheet_scale():
+    table = sheet({
+        "Particulars (₹ in Crores)": ["Revenue from operations", "Net loss", "ROE"],
+        "FY2023": [4800.0, 20.0, 12.1],
+        "FY2024": [5400.0, 45.0, 14.2],
+    })
+    doc = ParsedDocument(name="pl.xlsx", file_type="xlsx", text="P&L", tables=[table])
+
+    metrics = extract_metrics(doc)
+
+    assert metrics["Revenue"].value == 5400e7
+    assert metrics["Revenue"].previous == 4800e7
+    assert metrics["Revenue"].period == "FY2024"
+    assert metrics["Net Profit"].value == -45e7
+    assert metrics["ROE"].value == 14.2 and metrics["ROE"].unit == "%"
+
+
+def test_text_cells_in_a_numeric_column_are_still_parsed():
+    table = sheet({
+        "Particulars": ["Revenue", "EBITDA", "PAT", "Net Profit", "ROCE"],
+        "FY2024": [5400.0, 900.0, 400.0, 410.0, "(3.5)%"],
+    })
+    doc = ParsedDocument(name="pl.xlsx", file_type="xlsx", text="P&L", tables=[table])
+
+    assert extract_metrics(doc)["ROCE"].value == -3.5
+
+
+def test_qualified_revenue_is_not_taken_for_revenue():
+    text = ("Deferred revenue of Rs 12 Cr was carried forward.\n"
+            "Revenue from operations for the year stood at Rs 5,400 Cr (FY2023: Rs 4,800 Cr).\n"
+            "Segment revenue from the retail business grew to Rs 900 Cr in the year under review.\n")
+
+    revenue = extract_metrics(text)["Revenue"]
+
+    assert revenue.value == 5400e7 and revenue.previous == 4800e7
+
+
+def test_specific_revenue_labels_outrank_the_bare_one():
+    text = "Revenue grew on higher volumes to Rs 6,100 Cr.\nTotal revenue: Rs 5,600 Cr\n"
+
+    assert extract_metrics(text)["Revenue"].value == 5600e7
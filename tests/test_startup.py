@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.bench_startup import (
+    APP, COLD_START_BUDGET_S, RERUN_BUDGET_S, ROOT, app_imports, cold_start, rerun_times,
+)
+
+
+def test_app_imports_fit_the_cold_start_budget():
+    modules = app_imports()
+
+    assert "models.embeddings" in modules
+    assert cold_start(modules, repeat=3) <= COLD_START_BUDGET_S
+
+
+def test_faiss_is_not_imported_at_startup():
+    code = "; ".join(f"import {module}" for module in app_imports())
+    code += "; import sys; print(sorted(m for m in ('faiss', 'langchain_community') if m in sys.modules))"
+
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_reruns_fit_the_budget():
+    pytest.importorskip("streamlit")
+
+    _, rerun = rerun_times(APP, runs=3)
+
+    assert rerun <= RERUN_BUDGET_S
@@ -0,0 +1,94 @@
+import json
+import time
+from concurrent.futures import Future
+
+import pytest
+import requests
+
+import utils.web_search as web_search
+from utils.answer_cache import normalize_question
+from utils.web_search import _TTLCache, rank_results, search, search_async
+
+
+def organic(*results):
+    return {"organic_results": [{"title": title, "link": link, "snippet": snippet} for title, link, snippet in results]}
+
+
+PAYLOAD = organic(
+    ("Acme Q4 results", "https://www.acme.com/results/?utm_source=x", "Acme revenue rose 12% to Rs 5,400 Cr."),
+    ("Acme Q4 results", "https://acme.com/results", "Acme revenue rose 12% to Rs 5,400 Cr (mirror)."),
+    ("Markets today", "https://news.example/markets", "Indices closed flat."),
+)
+
+
+@pytest.fixture
+def serpapi(monkeypatch, local_server):
+    """A local stand-in for SerpAPI serving `local_server.payload` from /search."""
+    local_server.payload = PAYLOAD
+    local_server.routes["/search"] = lambda request: (200, {"Content-Type": "application/json"},
+                                                      json.dumps(local_server.payload).encode())
+    monkeypatch.setattr(web_search, "SERPAPI_URL", f"{local_server.url}/search")
+    monkeypatch.setattr(web_search, "SERPAPI_API_KEY", "test-key")
+    monkeypatch.setattr(web_search, "_cache", _TTLCache(max_entries=8, ttl=60))
+    return local_server
+
+
+def test_results_are_cached_per_normalized_query(serpapi):
+    first = search("Acme revenue 2024?")
+    second = search("  acme REVENUE 2024 ")
+
+    assert first and second == first
+    assert serpapi.hits("/search") == 1
+    assert serpapi.requests[0][2]["api_key"] == ["test-key"]
+
+
+def test_cached_results_expire(monkeypatch, serpapi):
+    search("acme revenue")
+    now = time.time()
+    monkeypatch.setattr(web_search.time, "time", lambda: now + 61)
+
+    search("acme revenue")
+
+    assert serpapi.hits("/search") == 2
+
+
+def test_duplicates_are_dropped_and_results_ranked_by_coverage():
+    ranked = rank_results("acme revenue", [
+        {"title": "Markets today", "link": "https://news.example/markets", "snippet": "Indices closed flat."},
+        {"title": "Acme", "link": "https://www.acme.com/results/?utm_source=x", "snippet": "Acme revenue rose 12%."},
+        {"title": "Acme", "link": "https://acme.com/results", "snippet": "Same page, other tracking link."},
+        {"title": "Copy", "link": "https://copy.example/a", "snippet": "ACME revenue rose 12%!"},
+    ])
+
+    assert [r["link"] for r in ranked] == ["https://www.acme.com/results/?utm_source=x", "https://news.example/markets"]
+    assert ranked[0]["score"] > ranked[1]["score"]
+
+
+def test_server_errors_return_nothing_and_are_not_cached(serpapi):
+    serpapi.routes["/search"] = lambda request: (503, {}, b"unavailable")
+
+    assert search("acme revenue") == []
+    assert serpapi.hits("/search") == 3  # the session retries twice
+
+    serpapi.routes["/search"] = lambda request: (200, {}, json.dumps(PAYLOAD).encode())
+    assert search("acme revenue")
+
+
+def test_timeouts_return_nothing_and_are_not_cached(monkeypatch, serpapi):
+    def slow(request):
+        time.sleep(0.5)
+        return 200, {}, json.dumps(PAYLOAD).encode()
+
+    serpapi.routes["/search"] = slow
+    monkeypatch.setattr(web_search, "WEB_SEARCH_TIMEOUT", (1, 0.1))
+    monkeypatch.setattr(web_search, "_session", requests.Session())  # no retries: one slow call is enough
+
+    assert search("acme revenue") == []
+    assert web_search._cache.get(normalize_question("acme revenue")) is None
+
+
+def test_search_async_returns_a_future(serpapi):
+    future = search_async("acme revenue", num=1)
+
+    assert isinstance(future, Future)
+    assert [r["link"] for r in future.result(timeout=5)] == ["https://www.acme.com/results/?utm_source=x"]
@@ -0,0 +1,85 @@
+import pytest
+
+import utils.workspace as workspace_module
+from benchmarks.fakes import HashingEmbeddings
+from models.faiss_index import build_faiss_store
+from utils.document_loader import ParsedDocument
+from utils.ingest_cache import IngestEntry
+from utils.workspace import Workspace
+
+
+class RecordingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    embeddings = RecordingEmbeddings()
+    monkeypatch.setattr(workspace_module, "get_embeddings", lambda: embeddings)
+    return embeddings
+
+
+def ingested(name, topic, embeddings, index_type, chunks=40):
+    texts = [f"{topic} note {i}: {topic} figures for the year" for i in range(chunks)]
+    metadatas = [{"chunk": i, "start_index": i * 50} for i in range(len(texts))]
+    entry = IngestEntry(key=name, document=ParsedDocument(name=f"{name}.pdf", file_type="pdf", text="\n".join(texts)))
+    entry.vectorstore = build_faiss_store(texts, metadatas, embeddings, index_type=index_type)
+    return entry
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf"])
+def test_add_copies_vectors_and_remove_deletes_only_that_document(embeddings, index_type):
+    first = ingested("fy2023", "inventory", embeddings, index_type)
+    second = ingested("fy2024", "receivables", embeddings, index_type)
+    embedded = embeddings.embedded
+
+    workspace = Workspace()
+    workspace.add(first)
+    workspace.add(second)
+    assert embeddings.embedded == embedded  # nothing re-embedded
+    assert workspace.vectorstore.index.ntotal == 80
+
+    workspace.remove("fy2023")
+
+    assert workspace.vectorstore.index.ntotal == 40
+    hits = workspace.retriever(k=5).invoke("inventory note 3")
+    assert hits and {hit.metadata["doc_id"] for hit in hits} == {"fy2024"}
+
+
+def test_vectors_match_the_source_index(embeddings):
+    entry = ingested("fy2024", "revenue", embeddings, "flat")
+    workspace = Workspace()
+    workspace.add(entry)
+
+    assert (workspace.vectorstore.index.reconstruct_n(0, 40) == entry.vectorstore.index.reconstruct_n(0, 40)).all()
+
+
+@pytest.mark.parametrize("index_type, chunks", [("ivf", 40), ("ivfpq", 150)])  # PQ trains on 256+ vectors
+def test_an_ivf_workspace_survives_remove_then_add(monkeypatch, embeddings, index_type, chunks):
+    import models.faiss_index as faiss_index
+
+    # Two documents push the workspace past flat, into IVF or (past the IVF limit) IVF-PQ
+    monkeypatch.setattr(faiss_index, "FAISS_FLAT_MAX", chunks + 20)
+    monkeypatch.setattr(faiss_index, "FAISS_IVF_MAX", chunks + 20 if index_type == "ivfpq" else 10_000)
+    workspace = Workspace()
+    workspace.add(ingested("a", "inventory", embeddings, "flat", chunks))
+    workspace.add(ingested("b", "receivables", embeddings, "flat", chunks))
+    assert type(workspace.vectorstore.index).__name__ == {"ivf": "IndexIVFFlat", "ivfpq": "IndexIVFPQ"}[index_type]
+
+    workspace.remove("a")
+    hits = workspace.vectorstore.similarity_search("receivables note 3", k=20)
+    assert len(hits) == 20 and {hit.metadata["doc_id"] for hit in hits} == {"b"}
+
+    workspace.add(ingested("c", "borrowings", embeddings, "flat", chunks))
+    assert workspace.vectorstore.index.ntotal == 2 * chunks
+    for topic, doc_id in (("receivables", "b"), ("borrowings", "c")):
+        hits = workspace.retriever(doc_ids=[doc_id], k=5).invoke(f"{topic} note 3")
+        assert hits and all(topic in hit.page_content for hit in hits)
+    ids = [workspace.vectorstore.index_to_docstore_id[p] for p in range(2 * chunks)]
+    assert ids == [f"b:{n}" for n in range(chunks)] + [f"c:{n}" for n in range(chunks)]
@@ -0,0 +1,139 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config.config import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_SIMILARITY
+from utils.tracing import tracer
+
+
+# Words that change which figure a question is about, beyond any token with a digit in it
+PERIOD_WORDS = frozenset(
+    "january february march april may june july august september october november december "
+    "jan feb mar apr jun jul aug sep sept oct nov dec quarter quarterly half annual annually yearly "
+    "ytd mtd previous prior last current this next".split()
+)
+
+
+def normalize_question(question):
+    question = re.sub(r"[^\w\s%]", " ", question.lower())
+    return re.sub(r"\s+", " ", question).strip()
+
+
+def question_anchors(normalized):
+    """Figures and periods in a normalized question ("fy2023", "12%", "q3", "march"): two
+    questions must share exactly these before one's answer can serve the other."""
+    return frozenset(t for t in normalized.split() if t in PERIOD_WORDS or any(c.isdigit() for c in t))
+
+
+class AnswerCache:
+    """Answers keyed by (document, provider, model, mode, question), with near-duplicate
+    questions matched by embedding similarity when their figures and periods agree. TTL + LRU eviction."""
+
+    def __init__(self, embed_fn=None, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL,
+                 threshold=ANSWER_CACHE_SIMILARITY):
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()  # key -> (stored_at, vector, answer, sources)
+        self._pending = OrderedDict()  # question -> vector from a missed lookup, reused by store()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def _embed(self, question):
+        if self.embed_fn is None:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(question), dtype=np.float32)
+        except Exception:
+            return None  # similarity matching is best-effort; exact matches still work
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _expired(self, stored_at):
+        return self.ttl and time.time() - stored_at > self.ttl
+
+    def lookup(self, doc_key, provider, model, mode, question, bypass=False):
+        """Return (answer, sources) or None. `bypass` is per call (one session's switch), so a
+        bypassed question is answered fresh and its answer still refreshes the cache."""
+        if bypass:
+            return None
+
+        with tracer.span("answer_cache", provider=provider) as span:
+            hit = self._lookup(doc_key, provider, model, mode, question)
+            span["cache_hit"] = hit is not None
+            return hit
+
+    def _lookup(self, doc_key, provider, model, mode, question):
+        scope = (doc_key, provider, model, mode)
+        key = scope + (normalize_question(question),)
+        anchors = question_anchors(key[4])
+
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit and self._expired(hit[0]):
+                del self._entries[key]
+                hit = None
+            if hit:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit[2], hit[3]
+
+        vector = self._embed(question)
+        if vector is not None:
+            with self._lock:
+                best_key, best_score = None, self.threshold
+                for other_key, (stored_at, other_vector, _, _) in self._entries.items():
+                    if other_key[:4] != scope or other_vector is None or self._expired(stored_at):
+                        continue
+                    if question_anchors(other_key[4]) != anchors:  # "net profit FY2023" vs "FY2024"
+                        continue
+                    score = float(np.dot(vector, other_vector))
+                    if score >= best_score:
+                        best_key, best_score = other_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.stats["semantic_hits"] += 1
+                    _, _, answer, sources = self._entries[best_key]
+                    return answer, sources
+
+        with self._lock:
+            self.stats["misses"] += 1
+            if vector is not None:
+                self._pending[question] = vector
+                while len(self._pending) > 64:
+                    self._pending.popitem(last=False)
+        return None
+
+    def store(self, doc_key, provider, model, mode, question, answer, sources):
+        key = (doc_key, provider, model, mode, normalize_question(question))
+        with self._lock:
+            vector = self._pending.pop(question, None)
+        if vector is None:
+            vector = self._embed(question)
+        with self._lock:
+            self._entries[key] = (time.time(), vector, answer, list(sources))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def hit_rate(self):
+        hits = self.stats["hits"] + self.stats["semantic_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+
+def _embed_query(question):
+    from models.embeddings import get_embeddings
+    return get_embeddings().embed_query(question)
+
+
+answer_cache = AnswerCache(embed_fn=_embed_query)
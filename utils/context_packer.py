@@ -0,0 +1,112 @@
+import re
+from dataclasses import dataclass
+
+from langchain_core.documents import Document
+
+from config.config import CONTEXT_TOKENS
+from utils.tokens import count_tokens
+
+
+@dataclass
+class _Span:
+    """A contiguous slice of one document, possibly several merged chunks."""
+    doc: object
+    start: int
+    end: int
+    text: str
+    tokens: int
+    rank: int
+
+
+def context_budget(provider):
+    return CONTEXT_TOKENS.get(provider, CONTEXT_TOKENS["default"])
+
+
+def chunk_tokens(doc):
+    """Token count recorded at ingest; counted on the fly for chunks indexed before it existed."""
+    tokens = doc.metadata.get("tokens")
+    return tokens if tokens is not None else count_tokens(doc.page_content)
+
+
+def _owner(doc):
+    return doc.metadata.get("doc_id"), doc.metadata.get("source")
+
+
+def _fingerprint(text):
+    return re.sub(r"\W+", " ", text.lower()).strip()
+
+
+def pack_context(docs, budget):
+    """Fit retrieved chunks (best first) into `budget` tokens.
+
+    Exact duplicates are dropped, and chunks that overlap or touch an already chosen chunk of
+    the same document are merged into it (and spans a merge bridges are folded together), so
+    the shared overlap is only sent once. Chunks are admitted in relevance order and skipped
+    when they would overflow the budget, letting a smaller, lower-ranked chunk still fill the
+    remainder. The top chunk is always kept. Returns Documents ordered by the rank of their
+    most relevant chunk.
+    """
+    spans, seen, used = [], set(), 0
+
+    for rank, doc in enumerate(docs):
+        fingerprint = _fingerprint(doc.page_content)
+        if not fingerprint or fingerprint in seen:
+            continue
+
+        text, tokens = doc.page_content, chunk_tokens(doc)
+        start = doc.metadata.get("start_index")
+        neighbour = None
+        if start is not None:
+            neighbour = next(
+                (s for s in spans if s.start is not None and _owner(s.doc) == _owner(doc)
+                 and start <= s.end and start + len(text) >= s.start),
+                None,
+            )
+
+        if neighbour is None:
+            if spans and used + tokens > budget:  # the best chunk is always sent
+                continue
+            spans.append(_Span(doc, start, None if start is None else start + len(text), text, tokens, rank))
+            used += tokens
+        else:
+            merged = _union(neighbour, start, text)
+            # Only the new characters cost anything; scale the chunk's ingest-time count by them
+            extra = round(tokens * (len(merged) - len(neighbour.text)) / max(len(text), 1))
+            if used + extra > budget:
+                continue
+            neighbour.start, neighbour.end = min(neighbour.start, start), max(neighbour.end, start + len(text))
+            neighbour.text, neighbour.tokens = merged, neighbour.tokens + extra
+            used += extra - _coalesce(neighbour, spans)
+        seen.add(fingerprint)
+
+    spans.sort(key=lambda s: s.rank)
+    return [
+        Document(page_content=s.text, metadata={**s.doc.metadata, "start_index": s.start, "tokens": s.tokens})
+        for s in spans
+    ]
+
+
+def _union(span, start, text):
+    """Text of `span` extended by an overlapping chunk starting at `start`."""
+    end = start + len(text)
+    if start >= span.start:
+        return span.text + text[span.end - start:] if end > span.end else span.text
+    return text + span.text[end - span.start:] if span.end > end else text
+
+
+def _coalesce(span, spans):
+    """Fold spans of the same document that `span` now overlaps into it; returns the tokens saved."""
+    saved = 0
+    for other in [s for s in spans if s is not span and s.start is not None and _owner(s.doc) == _owner(span.doc)
+                  and s.start <= span.end and s.end >= span.start]:
+        merged = _union(span, other.start, other.text)
+        # The part of `other` already in `span` was counted twice; estimate its tokens by length
+        shared = len(span.text) + len(other.text) - len(merged)
+        duplicate = round(other.tokens * shared / max(len(other.text), 1))
+        span.start, span.end = min(span.start, other.start), max(span.end, other.end)
+        span.text, span.tokens = merged, span.tokens + other.tokens - duplicate
+        if other.rank < span.rank:
+            span.doc, span.rank = other.doc, other.rank
+        spans.remove(other)
+        saved += duplicate
+    return saved
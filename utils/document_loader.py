@@ -1,24 +1,196 @@
-from PyPDF2 import PdfReader
-import docx
-import pandas as pd
+import multiprocessing
 import re
 
-MAX_PDF_PAGES = 20
-MAX_EXCEL_ROWS = 1000
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
 
-def load_document(file):
+from config.config import PDF_WORKERS, PDF_PAGES_PER_TASK, PDF_PARALLEL_MIN_PAGES, CHUNK_SIZE
+from utils.tracing import tracer
+
+# PyPDF2, python-docx and pandas are imported by the parsers that need them, so starting the
+# app (or parsing a plain PDF) doesn't pay for all three
+
+@dataclass
+class ParsedDocument:
+    """A document parsed once and shared by chunking, summary and metric extraction."""
+    name: str
+    file_type: str
+    text: str
+    pages: list = field(default_factory=list)   # (page_number, start, end) char offsets in text
+    tables: list = field(default_factory=list)  # pandas DataFrames (Excel sheets, DOCX tables)
+    blocks: list = field(default_factory=list)  # (metadata, start, end) pre-chunked spans, e.g. Excel row groups
+
+    def numeric_columns(self):
+        """{sheet: {column: float64 array}} for every mostly-numeric table column."""
+        result = {}
+        for i, table in enumerate(self.tables):
+            sheet = table.attrs.get("sheet", f"table{i + 1}")
+            columns = {str(table.columns[position]): values for position, values in numeric_arrays(table).items()}
+            if columns:
+                result[sheet] = columns
+        return result
+
+    def page_for_offset(self, offset):
+        """1-based page number containing a char offset, or None for page-less formats."""
+        if not self.pages:
+            return None
+        starts = [start for _, start, _ in self.pages]
+        index = max(bisect_right(starts, offset) - 1, 0)
+        return self.pages[index][0]
+
+def numeric_arrays(table):
+    """{column position: float64 array (NaN where blank)} for a table's mostly-numeric columns.
+    Dates, durations and booleans are not amounts, so they are left out."""
+    import pandas as pd
+
+    arrays = {}
+    for position in range(table.shape[1]):
+        column = table.iloc[:, position]
+        if (pd.api.types.is_datetime64_any_dtype(column) or pd.api.types.is_timedelta64_dtype(column)
+                or pd.api.types.is_bool_dtype(column)):
+            continue
+        values = pd.to_numeric(column, errors="coerce")
+        present = column.notna().sum()
+        if present and values.notna().sum() >= 0.8 * present:
+            arrays[position] = values.to_numpy(dtype="float64")
+    return arrays
+
+def _join_pages(page_texts):
+    """Join (page_number, text) pairs, skipping blank pages, and record each page's offsets."""
+    pages, parts, offset = [], [], 0
+    for page_number, page_text in page_texts:
+        if not page_text:
+            continue
+        pages.append((page_number, offset, offset + len(page_text)))
+        parts.append(page_text)
+        offset += len(page_text) + 1  # "\n" separator
+    return "\n".join(parts), pages
+
+_worker_reader = None
+
+def _init_pdf_worker(data):
+    # Each worker process parses the PDF once, then serves many page ranges from it
+    from PyPDF2 import PdfReader
+
+    global _worker_reader
+    _worker_reader = PdfReader(BytesIO(data))
+
+def _extract_page_range(start, end):
+    return [(i + 1, _worker_reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+def iter_pdf_pages(file, workers=PDF_WORKERS, pages_per_task=PDF_PAGES_PER_TASK):
+    """Yield (page_number, text) in page order while later pages are still being extracted.
+
+    Large PDFs are split into page ranges handled by a process pool. At most two ranges per
+    worker are in flight, so extraction holds a bounded number of pages beyond those already
+    yielded. The caller still keeps the text it joins (summary and metrics need all of it), but
+    can chunk and embed each page as it arrives (see parse_document's `on_pages`).
+    """
+    from PyPDF2 import PdfReader
+
+    if hasattr(file, "getvalue"):
+        data = file.getvalue()
+    else:
+        file.seek(0)
+        data = file.read()
+
+    reader = PdfReader(BytesIO(data))
+    page_count = len(reader.pages)
+
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for i, page in enumerate(reader.pages, start=1):
+            yield i, page.extract_text() or ""
+        return
+
+    ranges = ((start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task))
+    # Spawned, not forked: Streamlit's server process is multi-threaded, and forking it can
+    # copy locks held by other threads into the workers
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_pdf_worker, initargs=(data,)) as pool:
+        in_flight = deque()
+        for start, end in ranges:
+            in_flight.append(pool.submit(_extract_page_range, start, end))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+def _serialize_rows(df):
+    """One " | "-joined line per row, built column by column with vectorized string ops."""
+    cells = df.fillna("").astype(str)
+    if cells.shape[1] == 1:
+        return cells.iloc[:, 0]
+    return cells.iloc[:, 0].str.cat([cells[c] for c in cells.columns[1:]], sep=" | ")
+
+def _excel_blocks(sheets):
+    """Serialize every sheet into row groups that each repeat the sheet name and header row."""
+    parts, blocks, offset = [], [], 0
+    for sheet_name, df in sheets.items():
+        if df.empty:
+            continue
+        header = " | ".join(str(c) for c in df.columns)
+        lines = _serialize_rows(df)
+        # Size row groups so a block lands near one chunk
+        avg_len = max(int(lines.str.len().mean()), 1)
+        rows_per_block = max(CHUNK_SIZE // avg_len, 1)
+
+        for start in range(0, len(lines), rows_per_block):
+            rows = lines.iloc[start:start + rows_per_block].str.cat(sep="\n")
+            block = f"[Sheet: {sheet_name}]\n{header}\n{rows}"
+            metadata = {"sheet": str(sheet_name), "rows": f"{start + 1}-{min(start + rows_per_block, len(lines))}"}
+            blocks.append((metadata, offset, offset + len(block)))
+            parts.append(block)
+            offset += len(block) + 2  # "\n\n" separator
+    return "\n\n".join(parts), blocks
+
+def parse_document(file, on_pages=None):
+    """Read the file exactly once. Returns a ParsedDocument, or an error string starting with ❌.
+
+    `on_pages` wraps the stream of extracted PDF pages (e.g. PageEmbedder.consume) to work on
+    them while later pages are still being extracted.
+    """
+    size = len(file.getvalue()) if hasattr(file, "getvalue") else None
+    with tracer.span("parse", doc=file.name, bytes=size) as span:
+        parsed = _parse_document(file, on_pages)
+        if isinstance(parsed, str):
+            span["error"] = parsed
+        else:
+            span.update(file_type=parsed.file_type, chars=len(parsed.text), pages=len(parsed.pages), tables=len(parsed.tables))
+        return parsed
+
+def _parse_document(file, on_pages=None):
     file_type = file.name.split(".")[-1].lower()
+    tables, pages, blocks = [], [], []
+
+    if hasattr(file, "seek"):
+        file.seek(0)  # the stream may already have been read (e.g. hashed for the cache)
 
     try:
         if file_type == "pdf":
-            reader = PdfReader(file)
-            text = "\n".join(page.extract_text() for page in reader.pages if page.extract_text())
+            # extract_text() is expensive, so each page is extracted exactly once
+            page_texts = iter_pdf_pages(file)
+            text, pages = _join_pages(on_pages(page_texts) if on_pages else page_texts)
         elif file_type == "docx":
+            import docx
+            import pandas as pd
+
             doc = docx.Document(file)
             text = "\n".join([para.text for para in doc.paragraphs])
+            for table in doc.tables:
+                rows = [[cell.text for cell in row.cells] for row in table.rows]
+                if rows:
+                    tables.append(pd.DataFrame(rows[1:], columns=rows[0]))
         elif file_type == "xlsx":
-            df = pd.read_excel(file)
-            text = df.astype(str).apply(lambda x: ' '.join(x), axis=1).str.cat(sep='\n')
+            import pandas as pd
+
+            sheets = pd.read_excel(file, sheet_name=None)  # every sheet, no row cap
+            for sheet_name, df in sheets.items():
+                df.attrs["sheet"] = str(sheet_name)
+                tables.append(df)
+            text, blocks = _excel_blocks(sheets)
         elif file_type == "txt":
             text = file.read().decode("utf-8")
         else:
@@ -29,22 +201,24 @@ def load_document(file):
     if not text.strip():
         return "❌ Document is empty or unreadable."
 
-    return text
+    return ParsedDocument(name=file.name, file_type=file_type, text=text, pages=pages, tables=tables, blocks=blocks)
+
+def load_document(file):
+    parsed = parse_document(file)
+    if isinstance(parsed, str):
+        return parsed
+    return parsed.text
 
 def read_pdf(file):
     try:
-        reader = PdfReader(file)
-        if len(reader.pages) > MAX_PDF_PAGES:
-            return f"❌ File too large. Only PDFs with up to {MAX_PDF_PAGES} pages are supported."
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            text += page_text
+        text = "".join(page_text for _, page_text in iter_pdf_pages(file))
         return clean_text(text)
     except Exception as e:
         return f"❌ Failed to read PDF: {e}"
 
 def read_docx(file):
+    import docx
+
     try:
         doc = docx.Document(file)
         raw_text = "\n".join([para.text for para in doc.paragraphs])
@@ -53,11 +227,12 @@ def read_docx(file):
         return f"❌ Failed to read DOCX: {e}"
 
 def read_excel(file):
+    import pandas as pd
+
     try:
-        df = pd.read_excel(file)
-        if len(df) > MAX_EXCEL_ROWS:
-            return f"❌ Excel file too large. Max {MAX_EXCEL_ROWS} rows allowed."
-        return df.to_string(index=False)
+        sheets = pd.read_excel(file, sheet_name=None)
+        text, _ = _excel_blocks(sheets)
+        return text
     except Exception as e:
         return f"❌ Failed to read Excel: {e}"
 
@@ -0,0 +1,220 @@
+"""Fetch documents by URL.
+
+One pooled session serves every fetch. Bodies are streamed into a spooled temp file under a
+size cap, and the format comes from the file's magic bytes rather than the Content-Type
+header. Responses carrying an ETag or Last-Modified are kept on disk, so fetching the same
+URL again is a conditional GET; a 304 reuses the stored bytes, and with them the processed
+document already in the ingest cache. The store is evicted least-recently-used past a size cap.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from io import BytesIO
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.config import FETCH_MAX_MB, FETCH_SPOOL_MB, FETCH_TIMEOUT, FETCH_CACHE_DIR, FETCH_CACHE_MAX_MB
+from utils.ingest_cache import document_key
+from utils.tracing import tracer
+
+CHUNK_BYTES = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared session: keep-alive connections are reused across fetches and reruns."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session.headers["User-Agent"] = "Mozilla/5.0"
+        return _session
+
+
+def detect_format(file):
+    """File type from the content itself: "pdf", "docx", "xlsx", "txt", or None."""
+    file.seek(0)
+    head = file.read(2048)
+    file.seek(0)
+
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        # DOCX and XLSX are both ZIP packages; the part names tell them apart
+        try:
+            names = set(zipfile.ZipFile(file).namelist())
+        except zipfile.BadZipFile:
+            return None
+        finally:
+            file.seek(0)
+        if "word/document.xml" in names:
+            return "docx"
+        if "xl/workbook.xml" in names:
+            return "xlsx"
+        return None
+    if b"\x00" in head or head.lstrip().lower().startswith((b"<!doctype html", b"<html")):
+        return None
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:  # a multi-byte character cut at the end of the sample is fine
+            return None
+    return "txt"
+
+
+class _FetchCache:
+    """Last good response per URL: validators + file type in JSON, the body next to it."""
+
+    def __init__(self, root=FETCH_CACHE_DIR, max_bytes=FETCH_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, url):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, f"{name}.json"), os.path.join(self.root, f"{name}.bin")
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f), body_path
+
+    def touch(self, url):
+        """Mark a revalidated response as recently used for eviction."""
+        try:
+            os.utime(self._paths(url)[1])
+        except FileNotFoundError:
+            pass
+
+    def put(self, url, meta, spool):
+        meta_path, body_path = self._paths(url)
+        tmp_suffix = f".tmp-{os.getpid()}-{threading.get_ident()}"
+        spool.seek(0)
+        with open(body_path + tmp_suffix, "wb") as f:
+            shutil.copyfileobj(spool, f, CHUNK_BYTES)
+        with open(meta_path + tmp_suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(body_path + tmp_suffix, body_path)
+        os.replace(meta_path + tmp_suffix, meta_path)
+        spool.seek(0)
+        self._evict(keep=body_path)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".bin"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                entries.append((os.path.getmtime(path), path, os.path.getsize(path)))
+            except FileNotFoundError:  # evicted by another thread
+                continue
+        return sorted(entries)
+
+    def _evict(self, keep=None):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, _, size in entries)
+            for _, body_path, size in entries:
+                if total <= self.max_bytes:
+                    break
+                if body_path == keep:
+                    continue
+                for path in (body_path[:-len(".bin")] + ".json", body_path):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+    def total_bytes(self):
+        return sum(size for _, _, size in self._entries())
+
+
+_cache = None
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = _FetchCache()
+    return _cache
+
+
+def _as_document(data, file_type, url, not_modified):
+    file = BytesIO(data)
+    stem = os.path.splitext(os.path.basename(urlparse(url).path))[0] or "fetched"
+    file.name = f"{stem}.{file_type}"
+    file.doc_key = document_key(data)  # saves re-hashing the bytes on every rerun
+    file.not_modified = not_modified
+    return file
+
+
+def fetch_document(url, max_bytes=FETCH_MAX_MB * 1024 * 1024, timeout=FETCH_TIMEOUT):
+    """Download `url` as an upload-like BytesIO (with `name`, `doc_key`, `not_modified`),
+    or return an error string starting with ❌."""
+    cache = _get_cache()
+    cached = cache.get(url)
+    headers = {}
+    if cached:
+        meta, _ = cached
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    with tracer.span("fetch", conditional=bool(headers)) as span:
+        try:
+            with get_session().get(url, headers=headers, stream=True, timeout=timeout) as response:
+                span["status"] = response.status_code
+                if response.status_code == 304 and cached:
+                    span["cache_hit"] = True
+                    meta, body_path = cached
+                    cache.touch(url)
+                    with open(body_path, "rb") as f:
+                        return _as_document(f.read(), meta["file_type"], url, not_modified=True)
+                if response.status_code != 200:
+                    return f"❌ Failed to fetch the document (HTTP {response.status_code}). Check the URL."
+
+                length = response.headers.get("Content-Length")
+                if length and length.isdigit() and int(length) > max_bytes:
+                    return f"❌ Document is larger than the {max_bytes // (1024 * 1024)} MB limit."
+
+                with tempfile.SpooledTemporaryFile(max_size=FETCH_SPOOL_MB * 1024 * 1024) as spool:
+                    size = 0
+                    for block in response.iter_content(CHUNK_BYTES):
+                        size += len(block)
+                        if size > max_bytes:
+                            return f"❌ Document is larger than the {max_bytes // (1024 * 1024)} MB limit."
+                        spool.write(block)
+                    span.update(bytes=size, cache_hit=False)
+
+                    file_type = detect_format(spool)
+                    if file_type is None:
+                        return "❌ Unsupported or unrecognised document format at this URL."
+
+                    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+                    if etag or last_modified:
+                        cache.put(url, {"url": url, "etag": etag, "last_modified": last_modified,
+                                        "file_type": file_type}, spool)
+                    return _as_document(spool.read(), file_type, url, not_modified=False)
+        except requests.RequestException as e:
+            span["error"] = str(e)
+            return f"❌ Error fetching file: {e}"
@@ -0,0 +1,165 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any
+
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+
+TOKEN_RE = re.compile(r"[a-z0-9₹$€£][a-z0-9.,%/-]*[a-z0-9%]|[a-z0-9]")
+
+# Chunk-level lexical statistics need no stopwords beyond the most common glue words
+STOPWORDS = frozenset("a an and are as at be by for from has in is it of on or that the to was were what which with".split())
+
+
+def tokenize(text):
+    """Lowercase tokens that keep figures and codes intact ("fy2023", "1,234.5", "12%")."""
+    return [t.replace(",", "") for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index over a set of chunks, built once at ingest time.
+
+    Each posting list stores chunk positions with their precomputed BM25 weight, so a query
+    is a handful of vectorized adds. Docstore ids resolve positions back to the vectorstore's Documents.
+    """
+
+    def __init__(self, docstore_ids, postings, metadatas):
+        self.docstore_ids = docstore_ids
+        self.postings = postings  # term -> (int32 positions, float32 BM25 weights)
+        self.metadatas = metadatas
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, k1=1.5, b=0.75):
+        docstore_ids = [vectorstore.index_to_docstore_id[p] for p in range(len(vectorstore.index_to_docstore_id))]
+        docs = [vectorstore.docstore.search(docstore_id) for docstore_id in docstore_ids]
+        return cls.from_documents(docstore_ids, docs, k1=k1, b=b)
+
+    @classmethod
+    def from_documents(cls, docstore_ids, docs, k1=1.5, b=0.75):
+        doc_lengths, metadatas = [], []
+        raw_postings = defaultdict(list)
+        for position, doc in enumerate(docs):
+            tokens = tokenize(doc.page_content)
+            for term, tf in Counter(tokens).items():
+                raw_postings[term].append((position, tf))
+            doc_lengths.append(len(tokens))
+            metadatas.append(doc.metadata)
+
+        n = len(doc_lengths)
+        lengths = np.asarray(doc_lengths, dtype=np.float32)
+        length_norm = 1 - b + b * lengths / (lengths.mean() if n and lengths.mean() else 1.0)
+
+        postings = {}
+        for term, entries in raw_postings.items():
+            positions = np.fromiter((p for p, _ in entries), dtype=np.int32, count=len(entries))
+            tf = np.fromiter((t for _, t in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1 + (n - len(entries) + 0.5) / (len(entries) + 0.5))
+            weights = idf * tf * (k1 + 1) / (tf + k1 * length_norm[positions])
+            postings[term] = (positions, weights.astype(np.float32))
+        return cls(list(docstore_ids), postings, metadatas)
+
+    def search(self, query, k=10, allowed=None):
+        """Top-k (position, score); `allowed` is an optional metadata predicate."""
+        scores = np.zeros(len(self.docstore_ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                positions, weights = posting
+                scores[positions] += weights  # positions are unique within a posting list
+
+        candidates = np.flatnonzero(scores)
+        if allowed is not None:
+            candidates = np.array([p for p in candidates if allowed(self.metadatas[p])], dtype=np.int64)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(p), float(scores[p])) for p in ranked]
+
+
+def metadata_filter(filters):
+    """Predicate for filters like {"page": (10, 20), "sheet": ["P&L", "BS"], "source": "a.pdf"}.
+
+    Tuples are inclusive ranges, lists/sets are allowed values, anything else must match exactly.
+    """
+    if not filters:
+        return None
+
+    def allowed(metadata):
+        for key, expected in filters.items():
+            value = metadata.get(key)
+            if isinstance(expected, tuple):
+                low, high = expected
+                if value is None or (low is not None and value < low) or (high is not None and value > high):
+                    return False
+            elif isinstance(expected, (list, set, frozenset)):
+                if value not in expected:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    return allowed
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense FAISS search fused with BM25 via weighted reciprocal rank fusion.
+
+    `sparse_indexes` may hold several BM25 indexes (one per workspace document); their hits are
+    merged by score. Every index's docstore ids must exist in the vectorstore's docstore.
+    """
+
+    vectorstore: Any
+    sparse_indexes: list
+    k: int = 4
+    fetch_k: int = 20
+    dense_weight: float = 0.5
+    rrf_k: int = 60
+    sparse_min_ratio: float = 0.1
+    filters: dict = {}
+
+    def _dense_search(self, query, allowed):
+        vector = np.array([self.vectorstore._embed_query(query)], dtype=np.float32)
+        if self.vectorstore._normalize_L2:
+            import faiss  # only cosine stores need it; keeps tokenize() importable without FAISS
+
+            faiss.normalize_L2(vector)
+
+        fetch = self.fetch_k * 4 if allowed else self.fetch_k  # over-fetch when filters will drop hits
+        _, positions = self.vectorstore.index.search(vector, fetch)
+
+        hits = []
+        for position in positions[0]:
+            if position < 0:
+                continue
+            docstore_id = self.vectorstore.index_to_docstore_id[int(position)]
+            if allowed is None or allowed(self.vectorstore.docstore.search(docstore_id).metadata):
+                hits.append(docstore_id)
+            if len(hits) == self.fetch_k:
+                break
+        return hits
+
+    def _sparse_search(self, query, allowed):
+        hits = []
+        for sparse_index in self.sparse_indexes:
+            for position, score in sparse_index.search(query, k=self.fetch_k, allowed=allowed):
+                hits.append((score, sparse_index.docstore_ids[position]))
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        if not hits:
+            return []
+        # Chunks matching only common words score near zero; letting them vote would just
+        # double-count whatever dense search already ranked
+        cutoff = hits[0][0] * self.sparse_min_ratio
+        return [docstore_id for score, docstore_id in hits[:self.fetch_k] if score >= cutoff]
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        allowed = metadata_filter(self.filters)
+
+        fused = defaultdict(float)
+        for rank, docstore_id in enumerate(self._dense_search(query, allowed)):
+            fused[docstore_id] += self.dense_weight / (self.rrf_k + rank + 1)
+        for rank, docstore_id in enumerate(self._sparse_search(query, allowed)):
+            fused[docstore_id] += (1 - self.dense_weight) / (self.rrf_k + rank + 1)
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[:self.k]
+        return [self.vectorstore.docstore.search(docstore_id) for docstore_id in ranked]
@@ -0,0 +1,70 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from config.config import CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_ID, INGEST_CACHE_SIZE
+
+
+def read_file_bytes(file):
+    # Streamlit's UploadedFile and BytesIO both expose getvalue()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    data = file.read()
+    file.seek(0)
+    return data
+
+
+def document_key(data):
+    """Hash of the file bytes plus every setting that changes the processed result."""
+    h = hashlib.sha256(data)
+    h.update(f"|chunking=pages+row-groups|chunk_size={CHUNK_SIZE}|chunk_overlap={CHUNK_OVERLAP}|embedding={EMBEDDING_ID}".encode())
+    return h.hexdigest()
+
+
+@dataclass
+class IngestEntry:
+    key: str
+    document: object = None  # ParsedDocument
+    chunks: list = field(default_factory=list)
+    chunk_vectors: object = None  # callable returning vectors embedded during parsing, or None
+    vectorstore: object = None
+    sparse_index: object = None  # BM25Index over the same chunks
+    summaries: dict = field(default_factory=dict)  # provider -> summary
+    partial_summaries: dict = field(default_factory=dict)  # provider -> summary streamed so far
+    metrics: dict = field(default_factory=dict)    # provider -> metrics text
+    errors: dict = field(default_factory=dict)     # task -> error message from background ingestion
+
+
+class IngestCache:
+    """Size-bounded LRU of processed documents, shared across Streamlit reruns and sessions."""
+
+    def __init__(self, max_entries=INGEST_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry):
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+ingest_cache = IngestCache()
@@ -0,0 +1,117 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.config import INGEST_WORKERS, INGEST_RETRY_SECONDS
+from models.index_store import get_index_store
+from utils.insight_utils import stream_summary, extract_financial_metrics
+from utils.pipeline import ensure_index, FAILURE_PREFIXES
+from utils.tracing import tracer
+
+# Embedding, summary and metric extraction are network-bound, so they run side by side
+# on a shared pool instead of one after the other on the Streamlit script thread.
+_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+_futures = {}
+_failed_at = {}  # (doc key, task) -> monotonic time of the last failure
+_lock = threading.Lock()
+
+
+def _submit(entry, task, fn):
+    """Run fn(entry) once per (document, task); reruns get the in-flight future back.
+    A failed task is started again by the first rerun after INGEST_RETRY_SECONDS."""
+    job_key = (entry.key, task)
+    with _lock:
+        future = _futures.get(job_key)
+        if future is None:
+            failed_at = _failed_at.get(job_key)
+            if failed_at is not None and time.monotonic() - failed_at < INGEST_RETRY_SECONDS:
+                return None
+            future = _executor.submit(_run, entry, task, fn)
+            _futures[job_key] = future
+        return future
+
+
+def _run(entry, task, fn):
+    """fn(entry) stores its result on the entry, or returns an error message. Errors go to
+    entry.errors and never into the shared result slots, so every session can retry them."""
+    try:
+        # Each background task is its own trace; parse/chunk spans belong to the upload's rerun
+        with tracer.span(f"ingest.{task.split(':')[0]}", task=task, doc=entry.document.name,
+                         chars=len(entry.document.text), chunks=len(entry.chunks)) as span:
+            error = fn(entry)
+            if error:
+                span["error"] = error
+    except Exception as e:
+        error = f"❌ {task} failed: {e}"
+
+    job_key = (entry.key, task)
+    with _lock:
+        if error:
+            entry.errors[task] = error
+            _failed_at[job_key] = time.monotonic()
+        else:
+            entry.errors.pop(task, None)
+            _failed_at.pop(job_key, None)
+        _futures.pop(job_key, None)
+
+
+def _vectorstore_task(entry):
+    # 💾 A filing seen by any earlier session (or batch job) is reloaded from disk, not re-embedded
+    index = ensure_index(entry.key, entry.chunks, entry.chunk_vectors)
+    if isinstance(index, str):
+        return index
+    entry.chunk_vectors = None  # the vectors now live in the index
+    vectorstore, entry.sparse_index = index
+    entry.vectorstore = vectorstore  # set last: a ready vectorstore implies a ready sparse index
+
+
+def _load_artifacts(entry, provider):
+    artifacts = get_index_store().load_artifacts(entry.key)
+    if provider in artifacts["summaries"]:
+        entry.summaries.setdefault(provider, artifacts["summaries"][provider])
+    if provider in artifacts["metrics"]:
+        entry.metrics.setdefault(provider, artifacts["metrics"][provider])
+
+
+def schedule_ingestion(entry, provider):
+    """Start whatever the entry is still missing for this provider; returns immediately."""
+    if provider not in entry.summaries or provider not in entry.metrics:
+        _load_artifacts(entry, provider)
+
+    if entry.vectorstore is None:
+        _submit(entry, "vectorstore", _vectorstore_task)
+
+    if provider not in entry.summaries:
+        def summary_task(e):
+            # Tokens accumulate on the entry so the UI can show the summary while it streams
+            parts = []
+            try:
+                for token in stream_summary(e.document, model_provider=provider):
+                    parts.append(token)
+                    e.partial_summaries[provider] = "".join(parts)
+            except Exception as error:  # also mid-stream: the tokens so far are not a summary
+                return f"⚠️ Failed to generate summary: {error}"
+            finally:
+                e.partial_summaries.pop(provider, None)
+            summary = "".join(parts).strip()
+            e.summaries[provider] = summary
+            get_index_store().save_artifacts(e.key, summaries={provider: summary})
+        _submit(entry, f"summary:{provider}", summary_task)
+
+    if provider not in entry.metrics:
+        def metrics_task(e):
+            metrics = str(extract_financial_metrics(e.document, model_provider=provider))
+            if metrics.startswith(FAILURE_PREFIXES):
+                return metrics
+            e.metrics[provider] = metrics
+            get_index_store().save_artifacts(e.key, metrics={provider: metrics})
+        _submit(entry, f"metrics:{provider}", metrics_task)
+
+
+def is_pending(entry):
+    with _lock:
+        return any(
+            key == entry.key and not future.done()
+            for (key, _), future in _futures.items()
+        )
+
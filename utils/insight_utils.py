@@ -1,82 +1,255 @@
-from models.llm import get_chat_model
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
 
-def generate_summary(text, model_provider="openai"):
-    llm = get_chat_model(provider="groq", temperature=0.3)
+from models.llm import get_chat_model
+from utils.tokens import count_tokens, split_by_tokens
+from utils.tracing import tracer, in_current_trace
+from utils.metric_extractor import extract_metrics, format_metrics, parse_amount, GROWTH_METRIC
+from config.config import SECTION_TOKENS, MAP_REDUCE_WORKERS, SECTION_CACHE_SIZE, CHART_CACHE_SIZE
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You are a financial analyst. Your task is to summarize company documents "
+    "such as annual reports, profit/loss statements, balance sheets, or cash flow summaries. "
+    "Provide a clear, concise summary in plain English using bullet points or paragraphs."
+)
+
+SECTION_SUMMARY_PROMPT = (
+    "Summarize this section of a financial report. Keep every figure, period and unit exactly as written."
+)
+
+COMBINE_SUMMARY_PROMPT = (
+    "Combine these section summaries of one financial report into a single summary. "
+    "Remove repetition and keep the key figures."
+)
+
+METRIC_NAMES = ["Revenue", "Net Profit", "EBITDA", "ROE", "ROCE", "YoY Growth or Decline"]
+
+def _metrics_prompt(names):
+    wanted = "".join(f"- {name} (if available)\n" if name == GROWTH_METRIC else f"- {name}\n" for name in names)
+    return (
+        "You are a financial analyst. Extract the following from the document:\n"
+        f"{wanted}\n"
+        "Return in key-value pairs in plain text format (e.g., Revenue: ₹150 Cr)."
+    )
 
+METRICS_PROMPT = _metrics_prompt(METRIC_NAMES)
+# Combine rounds before the reduce step; each round should cut the summaries by a group factor
+MAX_REDUCE_ROUNDS = 4
+
+MISSING_VALUES = ("not found", "not available", "n/a", "na", "none", "not mentioned", "not provided", "-", "")
+
+class _SectionCache:
+    """LRU of per-section map results, keyed by provider + map prompt + section text.
+    Changing only the reduce prompt therefore reuses every section result."""
+
+    def __init__(self, max_entries=SECTION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+_section_cache = _SectionCache()
+
+def _content(response):
+    return response.content if hasattr(response, "content") else str(response)
+
+def _map_sections(sections, build_messages, provider):
+    """Run one LLM call per section with bounded concurrency, reusing cached section results."""
+    llm = get_chat_model(provider=provider, temperature=0.3)
+
+    def run(section):
+        messages = build_messages(section)
+        key = hashlib.sha256(f"{provider}\0{messages!r}".encode("utf-8")).hexdigest()
+        with tracer.span("llm", provider=provider, mode="map") as span:
+            result = _section_cache.get(key)
+            span["cache_hit"] = result is not None
+            if result is None:
+                span["prompt_tokens"] = count_tokens(str(messages))
+                result = _content(llm.invoke(messages)).strip()
+                span["completion_tokens"] = count_tokens(result)
+                _section_cache.put(key, result)
+            return result
+
+    with ThreadPoolExecutor(max_workers=MAP_REDUCE_WORKERS) as pool:
+        return list(pool.map(in_current_trace(run), sections))
+
+def _summary_messages(text, instruction="Summarize the following financial report:"):
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"{instruction}\n\n{text}"}
+    ]
 
+def _section_summary_messages(section):
+    return _summary_messages(section, SECTION_SUMMARY_PROMPT)
+
+def _reduce_input(summaries, provider, max_rounds=MAX_REDUCE_ROUNDS):
+    """Collapse section summaries until they fit one prompt; returns the text to summarize last.
+
+    Stops early when a round no longer shrinks the input (a model that echoes its input would
+    otherwise loop forever, since repeated rounds are answered from the section cache), so the
+    final prompt can then exceed SECTION_TOKENS.
+    """
+    combined = "\n\n".join(summaries)
+    for _ in range(max_rounds):
+        if count_tokens(combined) <= SECTION_TOKENS or len(summaries) <= 1:
+            break
+        groups = split_by_tokens(combined, SECTION_TOKENS)
+        if len(groups) >= len(summaries):
+            break
+        summaries = _map_sections(groups, lambda group: _summary_messages(group, COMBINE_SUMMARY_PROMPT), provider)
+        combined = "\n\n".join(summaries)
+    return combined
+
+def stream_summary(doc, model_provider="openai"):
+    """Map-reduce summary over the whole document; the final (reduce) step streams token by token.
+
+    Errors propagate, even after some tokens were sent, so a cut-off summary is never mistaken
+    for a whole one; generate_summary() turns them into a failure message.
+    """
+    text = getattr(doc, "text", doc)  # ParsedDocument or plain text
+    llm = get_chat_model(provider=model_provider, temperature=0.3)
 
-    system_prompt = (
-        "You are a financial analyst. Your task is to summarize company documents "
-        "such as annual reports, profit/loss statements, balance sheets, or cash flow summaries. "
-        "Provide a clear, concise summary in plain English using bullet points or paragraphs."
-    )
+    sections = split_by_tokens(text, SECTION_TOKENS)
+    if len(sections) <= 1:
+        messages = _summary_messages(text)
+    else:
+        section_summaries = _map_sections(sections, _section_summary_messages, model_provider)
+        messages = _summary_messages(_reduce_input(section_summaries, model_provider), COMBINE_SUMMARY_PROMPT)
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"Summarize the following financial report:\n\n{text[:3000]}"}  # Limit to 3000 chars
-    ]
+    tokens = (chunk.content for chunk in llm.stream(messages))
+    prompt_tokens = count_tokens("\n".join(m["content"] for m in messages))
+    yield from tracer.stream("llm", tokens, provider=model_provider, mode="reduce", prompt_tokens=prompt_tokens)
 
+def generate_summary(doc, model_provider="openai"):
     try:
-        response = llm.invoke(messages)
-        return response.content.strip()
+        return "".join(stream_summary(doc, model_provider=model_provider)).strip()
     except Exception as e:
         return f"⚠️ Failed to generate summary: {e}"
 
-def extract_financial_metrics(text, model_provider="openai"):
-    llm = get_chat_model(provider=model_provider, temperature=0.3)
-    prompt = (
-        "You are a financial analyst. Extract the following from the document:\n"
-        "- Revenue\n- Net Profit\n- EBITDA\n- ROE\n- ROCE\n"
-        "- YoY Growth or Decline (if available)\n\n"
-        "Return in key-value pairs in plain text format (e.g., Revenue: ₹150 Cr)."
-    )
+def merge_metrics(section_results):
+    """Merge per-section "Key: value" replies, keeping the first real value for each metric."""
+    merged = {}
+    for result in section_results:
+        for line in result.split("\n"):
+            if ":" not in line:
+                continue
+            key, value = line.split(":", 1)
+            key = key.strip(" -*•\t")
+            value = value.strip()
+            if not key or value.strip(" .").lower() in MISSING_VALUES:
+                continue
+            canonical = next((name for name in METRIC_NAMES if name.lower() in key.lower()), key)
+            merged.setdefault(canonical, value)
+
+    ordered = [name for name in METRIC_NAMES if name in merged] + [k for k in merged if k not in METRIC_NAMES]
+    return "\n".join(f"{name}: {merged[name]}" for name in ordered)
+
+def extract_financial_metrics(doc, model_provider="openai"):
+    """Key metrics matched locally from the text and tables; the LLM only looks for the rest."""
+    with tracer.span("metrics_local") as span:
+        local = extract_metrics(doc)
+        local_text = format_metrics(local, METRIC_NAMES)
+        # YoY growth is optional, so it alone never triggers an LLM call
+        missing = [name for name in METRIC_NAMES if name not in local and name != GROWTH_METRIC]
+        span.update(resolved=len(local), llm_fallback=bool(missing))
+    if not missing:
+        return local_text
+
+    wanted = missing + ([GROWTH_METRIC] if GROWTH_METRIC not in local else [])
+    llm_text = _llm_financial_metrics(doc, _metrics_prompt(wanted), model_provider)
+    if llm_text.startswith("❌"):
+        return local_text or llm_text
+    return merge_metrics([local_text, llm_text]) or "❌ No financial metrics found in the document."
+
+def _llm_financial_metrics(doc, metrics_prompt, model_provider):
+    """Extract metrics from every section in parallel and merge them into one table."""
+    text = getattr(doc, "text", doc)  # ParsedDocument or plain text
     try:
-        response = llm.invoke(prompt + "\n\n" + text[:3000])
-        return response.content if hasattr(response, "content") else str(response)
+        sections = split_by_tokens(text, SECTION_TOKENS)
+        if len(sections) <= 1:
+            llm = get_chat_model(provider=model_provider, temperature=0.3)
+            prompt = metrics_prompt + "\n\n" + text
+            with tracer.span("llm", provider=model_provider, mode="metrics", prompt_tokens=count_tokens(prompt)) as span:
+                result = _content(llm.invoke(prompt))
+                span["completion_tokens"] = count_tokens(result)
+                return result
+
+        results = _map_sections(sections, lambda section: metrics_prompt + "\n\n" + section, model_provider)
+        return merge_metrics(results) or "❌ No financial metrics found in the document."
 
     except Exception as e:
         return f"❌ Metric Extraction Error: {str(e)}"
 
-
-import matplotlib.pyplot as plt
-import re
-from io import BytesIO
+def _amount_axis(amounts):
+    """Common scale for the amount bars: ₹ Cr for Indian filings, millions otherwise."""
+    units = {unit for _, unit in amounts.values()}
+    if units <= {"INR", None}:
+        return 1e7, "₹ Cr"
+    currency = next(iter(units - {None})) if len(units - {None}) == 1 else ""
+    return 1e6, f"{currency} Mn".strip()
 
 def generate_financial_chart(insights_text):
-    numeric_metrics = {}
+    amounts, ratios = {}, {}
 
     for line in insights_text.split("\n"):
         if ":" in line:
             key, value = line.split(":", 1)
-            key = key.strip()
-            value = value.strip()
-
-            # Extract number (supports ₹, commas, decimals)
-            match = re.search(r"([\d,.]+)", value.replace(",", ""))
-            if match:
-                try:
-                    numeric_value = float(match.group(1))
-                    numeric_metrics[key] = numeric_value
-                except:
-                    pass
+            # Units, currencies and parentheses are honoured, so "₹150 Cr" and "$2.1 bn" compare correctly
+            parsed = parse_amount(value)
+            if parsed:
+                number, unit, is_percent = parsed
+                (ratios if is_percent else amounts)[key.strip()] = (number, unit)
 
-    if not numeric_metrics:
+    if not amounts and not ratios:
         return None
 
-    # Plot
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.bar(numeric_metrics.keys(), numeric_metrics.values(), color="teal")
-    ax.set_ylabel("Value")
-    ax.set_title("📊 Financial Insights (Chart)")
-    plt.xticks(rotation=45, ha="right")
-
-    # Save to buffer and return
-    buf = BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png")
-    plt.close()  # <== THIS IS IMPORTANT to prevent duplicate rendering
-    buf.seek(0)
-
-    return buf
-    
-
+    # Plot amounts and percentages on separate axes
+    panels = []
+    if amounts:
+        scale, label = _amount_axis(amounts)
+        panels.append((tuple((k, v / scale) for k, (v, _) in amounts.items()), label))
+    if ratios:
+        panels.append((tuple((k, v) for k, (v, _) in ratios.items()), "%"))
+
+    # Every rerun asks for the chart again; it is only drawn when the metrics change
+    return BytesIO(_render_chart(tuple(panels)))
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _render_chart(panels):
+    """PNG bytes for ((name, value) pairs, axis label) panels; keyed on the plotted values."""
+    # The Figure API needs no pyplot state (safe across session threads) and loads matplotlib lazily
+    from matplotlib.figure import Figure
+
+    # Traced here rather than per rerun: only cache misses do any work
+    with tracer.span("chart", panels=len(panels)):
+        fig = Figure(figsize=(8, 4))
+        axes = fig.subplots(1, len(panels), squeeze=False)
+        for ax, (values, label) in zip(axes[0], panels):
+            names, numbers = [k for k, _ in values], [v for _, v in values]
+            ax.bar(names, numbers, color=["teal" if v >= 0 else "indianred" for v in numbers])
+            ax.axhline(0, color="grey", linewidth=0.8)
+            ax.set_ylabel(label)
+            ax.tick_params(axis="x", labelrotation=45)
+        fig.suptitle("📊 Financial Insights (Chart)")
+        fig.tight_layout()
+
+        buf = BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
@@ -0,0 +1,296 @@
+"""Deterministic extraction of headline financial metrics from a ParsedDocument.
+
+Precompiled patterns find metric labels, then the first amount after each label on the same
+line: currency (₹/Rs/INR, $/USD, €, £), scale (Cr, Lakh, Mn, Bn, thousand), negatives in
+parentheses, and the reporting period. Tables are read cell by cell, taking periods from the
+column headers. Amounts are normalized to absolute currency units and every value keeps its
+source offsets, so results are checkable and cost no LLM call.
+"""
+import math
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.document_loader import numeric_arrays
+
+AMOUNT_METRICS = ("Revenue", "Net Profit", "EBITDA")
+RATIO_METRICS = ("ROE", "ROCE")
+GROWTH_METRIC = "YoY Growth or Decline"
+
+# Bare "revenue" only counts when no qualifier names a narrower figure ("Deferred revenue of ...")
+_QUALIFIERS = ("deferred", "segment", "segmental", "unearned", "other")
+_GENERIC_REVENUE = "".join(f"(?<!{word} )" for word in _QUALIFIERS) + "revenue"
+_LABELS = {
+    "Revenue": rf"revenue from operations|total revenue|{_GENERIC_REVENUE}|total income|net sales|turnover",
+    "Net Profit": r"net profit|profit after tax|\bPAT\b|net income|profit for the (?:year|period|quarter)",
+    "EBITDA": r"\bEBITDA\b",
+    "ROE": r"return on (?:average )?equity|\bRoA?E\b",
+    "ROCE": r"return on capital employed|\bROCE\b",
+}
+LABEL_RE = {name: re.compile(pattern, re.I) for name, pattern in _LABELS.items()}
+# Labels that lose to a more specific one for the same metric, whatever their position
+GENERIC_LABELS = {"revenue"}
+LOSS_RE = re.compile(r"net loss|loss after tax|loss for the (?:year|period|quarter)", re.I)
+# The lookaheads let the engine skip most positions cheaply (about 6x faster on long filings)
+ANY_LABEL_RE = re.compile(r"\b(?=[rtnpel])(?:" + "|".join([*_LABELS.values(), LOSS_RE.pattern]) + ")", re.I)
+
+AMOUNT_RE = re.compile(
+    r"""
+    (?=[(\-−–₹$€£\d]|rs|inr|usd|eur|gbp)
+    (?P<open>\()?\s*
+    (?P<sign>[-−–])?\s*
+    (?P<currency>₹|rs\.?|inr|us\$|usd|\$|€|eur|£|gbp)?\s*
+    (?:(?<=[₹$€£.])|(?<=rs)|(?<=inr|usd|eur|gbp)|(?<![\w.]))
+    (?P<number>\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)
+    (?:\s*(?P<unit>%|crores?\b|cr\b\.?|lakhs?\b|lacs?\b|mn\b|million\b|bn\b|billion\b|thousand\b))?
+    (?P<close>\s*\))?
+    (?:\s*(?P<unit_after>%|crores?\b|cr\b\.?|lakhs?\b|lacs?\b|mn\b|million\b|bn\b|billion\b|thousand\b))?
+    """,
+    re.I | re.X,
+)
+PERIOD_RE = re.compile(r"\b(?:FY|F\.Y\.)\s*'?(\d{2}(?:\d{2})?)(?:\s*[-/]\s*'?(\d{2}(?:\d{2})?))?\b|\b((?:19|20)\d{2})\b", re.I)
+UNIT_HINT_RE = re.compile(r"(?:₹|rs\.?|inr|\$|usd)?\s*in\s+(crores?|cr\b|lakhs?|lacs?|millions?|mn\b|billions?|bn\b|thousands?)", re.I)
+
+SCALES = {"cr": 1e7, "crore": 1e7, "lakh": 1e5, "lac": 1e5, "mn": 1e6, "million": 1e6,
+          "bn": 1e9, "billion": 1e9, "thousand": 1e3}
+CURRENCIES = {"₹": "INR", "rs": "INR", "inr": "INR", "$": "USD", "us$": "USD", "usd": "USD",
+              "€": "EUR", "eur": "EUR", "£": "GBP", "gbp": "GBP"}
+
+# Label and value must sit close together on one line
+MAX_GAP = 160
+
+
+@dataclass
+class MetricValue:
+    name: str
+    value: float  # absolute currency units, or percent for ratios
+    unit: Optional[str]  # "INR", "USD", ..., "%" or None
+    raw: str  # the text as written, e.g. "₹ 1,234.5 Cr"
+    period: Optional[str] = None
+    start: Optional[int] = None  # offsets into ParsedDocument.text (None for table cells)
+    end: Optional[int] = None
+    location: str = "text"  # "p. 12" for paged documents, "<sheet> row <n> / <column>" for tables
+    previous: Optional[float] = None  # prior-period value when stated alongside
+    label: str = ""  # the label as matched, e.g. "Revenue from operations"
+
+    def display(self):
+        notes = [note for note in (self.period, self.location if self.location != "text" else None) if note]
+        return f"{self.raw} ({', '.join(notes)})" if notes else self.raw
+
+
+def _scale(unit):
+    if not unit:
+        return None
+    unit = unit.lower().rstrip(".")
+    return SCALES.get(unit) or SCALES.get(unit.rstrip("s"))
+
+
+def _amount(match, default_scale=None):
+    """(value, unit, is_percent, has_marker) for an AMOUNT_RE match."""
+    number = float(match.group("number").replace(",", ""))
+    negative = bool(match.group("sign")) or bool(match.group("open") and match.group("close"))
+    unit = match.group("unit") or match.group("unit_after")  # "(1,234) Cr", "(3.5)%"
+    currency = CURRENCIES.get((match.group("currency") or "").lower().rstrip("."))
+    if unit == "%":
+        return (-number if negative else number), "%", True, True
+    scale = _scale(unit) or default_scale or 1.0
+    value = number * scale
+    return (-value if negative else value), currency, False, bool(currency or _scale(unit))
+
+
+def parse_amount(text, default_scale=None, skip_years=True):
+    """First amount in `text` as (value, unit, is_percent), or None. Bare years are skipped
+    unless `skip_years` is off (table cells), and "FY2024" is never read as an amount."""
+    for match in AMOUNT_RE.finditer(text):
+        value, unit, is_percent, has_marker = _amount(match, default_scale)
+        if has_marker or not (skip_years and _looks_like_year(match)):
+            return value, unit, is_percent
+    return None
+
+
+def format_amount(value, unit):
+    """Normalized value back in reporting units: ₹ and unscaled Indian figures in Cr, others in Mn."""
+    if unit == "%":
+        return f"{value:g}%"
+    symbol = {"INR": "₹", "USD": "$", "EUR": "€", "GBP": "£"}.get(unit, "")
+    if unit in ("INR", None):
+        return f"{symbol}{value / 1e7:,.2f} Cr"
+    return f"{symbol}{value / 1e6:,.2f} Mn"
+
+
+def _has_scale(text):
+    match = AMOUNT_RE.search(text)
+    return bool(match and _scale(match.group("unit") or match.group("unit_after")))
+
+
+def _looks_like_year(match):
+    number = match.group("number")
+    return number.isdigit() and len(number) == 4 and 1900 <= int(number) <= 2100
+
+
+def _period_year(period):
+    numbers = [n for n in re.findall(r"\d{2,4}", period)]
+    if not numbers:
+        return 0
+    year = int(numbers[-1])
+    return year + 2000 if year < 100 else year
+
+
+def _period(text):
+    matches = list(PERIOD_RE.finditer(text))
+    return matches[-1].group(0) if matches else None
+
+
+def _raw(match):
+    return re.sub(r"\s+", " ", match.group(0).strip()).rstrip(".")  # "Cr." at a sentence end
+
+
+def unit_hint(text):
+    """Document-wide scale such as "(₹ in Crores)" for bare numbers in tables."""
+    match = UNIT_HINT_RE.search(text[:20000])
+    return _scale(match.group(1)) if match else None
+
+
+def _classify(label_text):
+    for name, label_re in [*LABEL_RE.items(), ("Net Profit", LOSS_RE)]:
+        if label_re.fullmatch(label_text):
+            return name, label_re
+    return None, None
+
+
+def _text_candidates(text):
+    # One pass over the text for all labels; each hit is then classified
+    for label in ANY_LABEL_RE.finditer(text):
+        name, label_re = _classify(label.group(0))
+        if name is None:
+            continue
+        line_end = text.find("\n", label.end())
+        line_end = len(text) if line_end < 0 else line_end
+        segment_end = min(line_end, label.end() + MAX_GAP)
+        # Stop at the next metric label so "ROE ... ROCE 8%" never gives ROE the ROCE figure
+        for following in ANY_LABEL_RE.finditer(text, label.end(), segment_end):
+            if not label_re.fullmatch(following.group(0)):  # "Return on equity (ROE)" is one label
+                segment_end = following.start()
+                break
+
+        values = []
+        for match in AMOUNT_RE.finditer(text, label.end(), segment_end):
+            value, unit, is_percent, has_marker = _amount(match)
+            if is_percent != (name in RATIO_METRICS) or not has_marker:
+                continue
+            values.append((match, value, unit))
+            if len(values) == 2:
+                break
+        if not values:
+            continue
+
+        match, value, unit = values[0]
+        raw = _raw(match)
+        if label_re is LOSS_RE and value > 0:
+            value, raw = -value, f"-{raw}"  # "Net loss of ₹45 Cr" is a negative net profit
+        line_start = text.rfind("\n", 0, label.start()) + 1
+        yield MetricValue(
+            name=name, value=value, unit=unit, raw=raw,
+            period=_period(text[line_start:match.start()]),
+            start=match.start(), end=match.end(),
+            previous=values[1][1] if len(values) > 1 and name in AMOUNT_METRICS else None,
+            label=label.group(0),
+        )
+
+
+def _table_candidates(table, default_scale):
+    if table.empty or table.shape[1] < 2:
+        return
+    headers = [str(c) for c in table.columns]
+    scale = unit_hint(" ".join(headers)) or default_scale
+    # Latest period first when the headers name periods
+    value_columns = sorted(range(1, len(headers)), key=lambda i: -_period_year(_period(headers[i]) or ""))
+    sheet = table.attrs.get("sheet", "table")
+    numeric = numeric_arrays(table)  # typed values; only text cells are parsed
+
+    for row_number, (label, *_) in enumerate(table.itertuples(index=False, name=None)):
+        label = str(label)
+        name, label_match = None, None
+        for candidate_name, label_re in LABEL_RE.items():
+            label_match = label_re.search(label)
+            if label_match:
+                name = candidate_name
+                break
+        loss = name is None and LOSS_RE.search(label)
+        if loss:
+            name, label_match = "Net Profit", loss
+        if name is None:
+            continue
+
+        values = []
+        for column in value_columns:
+            number = numeric[column][row_number] if column in numeric else math.nan
+            if not math.isnan(number):
+                ratio = name in RATIO_METRICS
+                parsed = (float(number), "%", True) if ratio else (float(number) * (scale or 1.0), None, False)
+                cell_text = f"{number:g}%" if ratio else f"{number:g}"
+            else:
+                cell = table.iat[row_number, column]
+                if cell is None or (isinstance(cell, float) and math.isnan(cell)):
+                    continue
+                cell_text = str(cell)
+                if name in RATIO_METRICS and "%" not in cell_text:
+                    cell_text += "%"
+                parsed = parse_amount(cell_text, default_scale=scale, skip_years=False)
+                if parsed is None or parsed[2] != (name in RATIO_METRICS):
+                    continue
+            values.append((column, cell_text, parsed))
+            if len(values) == 2:
+                break
+        if not values:
+            continue
+
+        column, cell_text, (value, unit, is_percent) = values[0]
+        raw = cell_text.strip()
+        if loss and value > 0:
+            value, raw = -value, f"-{raw}"
+        if scale and not is_percent and not _has_scale(cell_text):
+            raw = format_amount(value, unit)  # bare cells only mean something with the sheet's scale attached
+        yield MetricValue(
+            name=name, value=value, unit=unit, raw=raw,
+            period=_period(headers[column]), location=f"{sheet} row {row_number + 2} / {headers[column]}",
+            previous=values[1][2][0] if len(values) > 1 and name in AMOUNT_METRICS else None,
+            label=label_match.group(0),
+        )
+
+
+def _rank(candidate):
+    # Prefer explicit units, then specific labels ("Revenue from operations" over "Revenue"),
+    # then the latest period, then the earliest mention
+    return (candidate.unit is None, candidate.label.lower() in GENERIC_LABELS,
+            -_period_year(candidate.period or ""), candidate.start or 0)
+
+
+def extract_metrics(doc):
+    """{metric name: MetricValue} for every metric found in the document's text and tables."""
+    text = getattr(doc, "text", doc)
+    candidates = list(_text_candidates(text))
+    if getattr(doc, "pages", None):
+        for candidate in candidates:
+            candidate.location = f"p. {doc.page_for_offset(candidate.start)}"  # cite the source page
+    scale = unit_hint(text)
+    for table in getattr(doc, "tables", []):
+        candidates.extend(_table_candidates(table, scale))
+
+    best = {}
+    for candidate in sorted(candidates, key=_rank):
+        best.setdefault(candidate.name, candidate)
+
+    revenue = best.get("Revenue")
+    if revenue and revenue.previous:
+        growth = (revenue.value - revenue.previous) / abs(revenue.previous) * 100
+        best[GROWTH_METRIC] = MetricValue(
+            name=GROWTH_METRIC, value=round(growth, 2), unit="%", raw=f"{growth:+.1f}% revenue",
+            period=revenue.period, start=revenue.start, end=revenue.end, location=revenue.location,
+        )
+    return best
+
+
+def format_metrics(metrics, order):
+    """Key-value lines in the same shape the LLM is asked for (e.g. "Revenue: ₹150 Cr (FY2024)")."""
+    return "\n".join(f"{name}: {metrics[name].display()}" for name in order if name in metrics)
@@ -0,0 +1,179 @@
+"""UI-independent ingestion and query service used by the Streamlit app and cli.py.
+
+Everything is keyed by document hash and persisted through the index store, so a filing
+processed by a batch job is picked up by the web app without re-embedding or new LLM calls.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+from config.config import CONTEXT_CANDIDATES
+from models.embeddings import PageEmbedder, build_vectorstore, get_embeddings, split_document
+from models.index_store import get_index_store
+from models.llm import get_chat_model
+from utils.document_loader import parse_document
+from utils.hybrid_retriever import BM25Index, HybridRetriever
+from utils.ingest_cache import document_key, read_file_bytes
+from utils.insight_utils import generate_summary, extract_financial_metrics
+from utils.rag_utils import stream_rag_response_with_sources
+from utils.tracing import tracer
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".xlsx", ".txt")
+
+# Error replies from the insight helpers; these are never persisted as artifacts
+FAILURE_PREFIXES = ("❌", "⚠️")
+
+
+def open_document(path):
+    """Load a file from disk into the same file-like shape Streamlit uploads have."""
+    with open(path, "rb") as f:
+        file = BytesIO(f.read())
+    file.name = os.path.basename(path)
+    return file
+
+
+def parse_and_chunk(file, key):
+    """(ParsedDocument, chunks, vectors), or an error string starting with ❌.
+
+    A PDF that isn't indexed yet is chunked and embedded page by page while later pages are
+    still being extracted; `vectors` is then a callable for ensure_index, otherwise None.
+    """
+    embedder = PageEmbedder() if file.name.lower().endswith(".pdf") and not get_index_store().exists(key) else None
+    parsed = parse_document(file, on_pages=embedder.consume if embedder else None)
+    if isinstance(parsed, str):
+        return parsed
+    if embedder and embedder.chunks:
+        return parsed, embedder.chunks, embedder.vectors
+    return parsed, split_document(parsed), None
+
+
+def ensure_index(key, chunks, vectors=None):
+    """(vectorstore, sparse_index) for a document: reloaded from disk if known, otherwise built
+    (from `vectors` when parse_and_chunk embedded ahead) and saved. Returns an error string
+    starting with ❌ on failure."""
+    index_store = get_index_store()
+    vectorstore = index_store.load(key, get_embeddings())
+    sparse_index = index_store.load_sparse_index(key) if vectorstore is not None else None
+
+    if vectorstore is None:
+        vectorstore = build_vectorstore(chunks, vectors)
+        if isinstance(vectorstore, str):
+            return vectorstore
+
+    if sparse_index is None:
+        sparse_index = BM25Index.from_vectorstore(vectorstore)
+        index_store.save(key, vectorstore, sparse_index)
+
+    return vectorstore, sparse_index
+
+
+def process_document(file, provider="groq", insights=True):
+    """Parse, index and (optionally) summarize one document; returns a JSON-serializable record."""
+    with tracer.span("process_document", doc=file.name, provider=provider) as span:
+        record = _process_document(file, provider, insights)
+        span.update(status=record["status"], doc_key=record["doc_key"])
+        return record
+
+
+def _process_document(file, provider, insights):
+    start = time.perf_counter()
+    key = document_key(read_file_bytes(file))
+    record = {"name": file.name, "doc_key": key, "provider": provider}
+
+    parsed = parse_and_chunk(file, key)
+    if isinstance(parsed, str):
+        return {**record, "status": "error", "error": parsed}
+
+    parsed, chunks, vectors = parsed
+    index = ensure_index(key, chunks, vectors)
+    if isinstance(index, str):
+        return {**record, "status": "error", "error": index}
+
+    record.update(pages=len(parsed.pages), chunks=len(chunks), chars=len(parsed.text))
+
+    if insights:
+        index_store = get_index_store()
+        artifacts = index_store.load_artifacts(key)
+        summary = artifacts["summaries"].get(provider) or generate_summary(parsed, model_provider=provider)
+        metrics = artifacts["metrics"].get(provider) or str(extract_financial_metrics(parsed, model_provider=provider))
+        index_store.save_artifacts(
+            key,
+            summaries={} if summary.startswith(FAILURE_PREFIXES) else {provider: summary},
+            metrics={} if metrics.startswith(FAILURE_PREFIXES) else {provider: metrics},
+        )
+        record.update(summary=summary, metrics=metrics)
+
+    return {**record, "status": "ok", "seconds": round(time.perf_counter() - start, 3)}
+
+
+def ask(key, question, provider="groq", temperature=0.3, k=CONTEXT_CANDIDATES):
+    """Answer a question against a previously processed document; returns (answer, sources)."""
+    with tracer.span("question", provider=provider, doc_key=key):
+        return _ask(key, question, provider, temperature, k)
+
+
+def _ask(key, question, provider, temperature, k):
+    index_store = get_index_store()
+    vectorstore = index_store.load(key, get_embeddings())
+    if vectorstore is None:
+        return f"❌ Unknown document: {key}. Process it first.", []
+
+    sparse_index = index_store.load_sparse_index(key)
+    retriever = HybridRetriever(vectorstore=vectorstore, sparse_indexes=[sparse_index], k=k) if sparse_index else None
+    model = get_chat_model(provider=provider, temperature=temperature)
+    tokens, sources = stream_rag_response_with_sources(question, vectorstore, model, k=k, retriever=retriever)
+    return "".join(tokens).strip(), sources
+
+
+def find_documents(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def _checkpoint_id(path, directory):
+    stat = os.stat(path)
+    return f"{os.path.relpath(path, directory)}\t{stat.st_size}\t{int(stat.st_mtime)}"
+
+
+def ingest_directory(directory, output, checkpoint=None, workers=4, provider="groq", insights=True):
+    """Process every supported file under `directory` on a worker pool.
+
+    One JSON record per document is appended to `output`. Finished files are appended to the
+    checkpoint (default: `<output>.checkpoint`), so an interrupted run resumes where it stopped.
+    Files whose size or mtime changed are processed again.
+    """
+    checkpoint = checkpoint or f"{output}.checkpoint"
+    done = set()
+    if os.path.exists(checkpoint):
+        with open(checkpoint, encoding="utf-8") as f:
+            done = {line.rstrip("\n") for line in f if line.strip()}
+
+    found = [(path, _checkpoint_id(path, directory)) for path in find_documents(directory)]
+    pending = [(path, checkpoint_id) for path, checkpoint_id in found if checkpoint_id not in done]
+    stats = {"skipped": len(found) - len(pending), "ok": 0, "error": 0}
+
+    def run(path):
+        try:
+            return process_document(open_document(path), provider=provider, insights=insights)
+        except Exception as e:
+            return {"name": os.path.basename(path), "status": "error", "error": f"❌ {e}"}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, \
+            open(output, "a", encoding="utf-8") as out, \
+            open(checkpoint, "a", encoding="utf-8") as checkpoint_file:
+        futures = {pool.submit(run, path): (path, checkpoint_id) for path, checkpoint_id in pending}
+        for future in as_completed(futures):
+            path, checkpoint_id = futures[future]
+            record = {**future.result(), "path": path}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            stats[record["status"]] += 1
+            if record["status"] == "ok":
+                checkpoint_file.write(checkpoint_id + "\n")
+                checkpoint_file.flush()
+
+    return stats
@@ -1,15 +1,21 @@
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
 from langchain_core.exceptions import OutputParserException
 from langchain_core.documents import Document
 
-from models.llm import get_chat_model
+from config.config import CONTEXT_CANDIDATES
+
+from models.llm import get_chat_model, provider_name
+from utils.context_packer import context_budget, pack_context
+from utils.tokens import count_tokens
+from utils.tracing import tracer
 
 
 def get_rag_response(query, vectorstore, model_provider="openai"):
     if not vectorstore:
         return "⚠️ No document found. Please upload a file first."
 
+    from langchain.chains import RetrievalQA
+
     try:
         retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 4})
         llm = get_chat_model(provider="groq", temperature=0.3)
@@ -70,3 +76,50 @@ def get_rag_response_with_sources(prompt, vectorstore, model):
             sources.append(doc.page_content.strip())
 
     return answer, sources
+
+# Same prompt as the default "stuff" chain used by get_rag_response_with_sources
+STUFF_PROMPT = PromptTemplate.from_template(
+    "Use the following pieces of context to answer the question at the end. "
+    "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n\n"
+    "{context}\n\nQuestion: {question}\nHelpful Answer:"
+)
+
+def stream_rag_response_with_sources(prompt, vectorstore, model, k=CONTEXT_CANDIDATES, retriever=None, budget=None,
+                                     instruction=None):
+    """Retrieve up front, then return (token generator, sources) so the answer can render as it streams.
+
+    `k` candidates (or the retriever's own k) are packed into the provider's context token
+    budget, so overlapping neighbours are sent once and the prompt size tracks the model.
+    `instruction` ("Answer concisely.") goes to the model only; retrieval embeds the bare
+    question, the same text the answer cache embeds, so the query vector is computed once.
+    """
+    provider = provider_name(model)
+    budget = budget or context_budget(provider)
+    with tracer.span("retrieve", hybrid=retriever is not None, k=k) as span:
+        if retriever is not None:
+            docs = retriever.invoke(prompt)
+        else:
+            docs = vectorstore.similarity_search(prompt, k=k)
+        span["chunks"] = len(docs)
+
+    with tracer.span("pack_context", candidates=len(docs), budget=budget) as span:
+        docs = pack_context(docs, budget)
+        span.update(chunks=len(docs), context_tokens=sum(doc.metadata["tokens"] for doc in docs))
+
+    context = "\n\n".join(doc.page_content for doc in docs)
+    sources = [doc.page_content.strip() for doc in docs]
+    llm_prompt = STUFF_PROMPT.format(context=context, question=f"{instruction}\n{prompt}" if instruction else prompt)
+
+    def tokens():
+        for chunk in model.stream(llm_prompt):
+            yield chunk.content
+
+    stream = tracer.stream("llm", tokens(), provider=provider, mode="rag", prompt_tokens=count_tokens(llm_prompt))
+    return stream, sources
+
+def stream_chat_response(prompt, model):
+    def tokens():
+        for chunk in model.stream(prompt):
+            yield chunk.content
+
+    yield from tracer.stream("llm", tokens(), provider=provider_name(model), mode="chat", prompt_tokens=count_tokens(prompt))
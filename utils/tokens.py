@@ -0,0 +1,53 @@
+from functools import lru_cache
+
+import tiktoken
+
+
+class _ApproximateEncoding:
+    """~4 characters per token, for hosts where tiktoken cannot download its BPE files."""
+
+    def encode(self, text, disallowed_special=()):
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name="cl100k_base"):
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return _ApproximateEncoding()
+
+
+def count_tokens(text):
+    """Approximate token count; cl100k_base is close enough for Groq/Gemini budgeting."""
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def split_by_tokens(text, max_tokens):
+    """Split text into sections of at most max_tokens, breaking on line boundaries where possible."""
+    encoding = get_encoding()
+    sections, current, current_tokens = [], [], 0
+
+    for line in text.split("\n"):
+        line_tokens = len(encoding.encode(line, disallowed_special=())) + 1
+        if line_tokens > max_tokens:
+            # A single oversized line is cut on token boundaries
+            if current:
+                sections.append("\n".join(current))
+                current, current_tokens = [], 0
+            ids = encoding.encode(line, disallowed_special=())
+            for i in range(0, len(ids), max_tokens):
+                sections.append(encoding.decode(ids[i:i + max_tokens]))
+            continue
+        if current_tokens + line_tokens > max_tokens and current:
+            sections.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+
+    if current:
+        sections.append("\n".join(current))
+    return [section for section in sections if section.strip()]
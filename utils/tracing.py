@@ -0,0 +1,218 @@
+"""Per-stage timing and cost tracing.
+
+Each pipeline stage (parse, chunk, embed, retrieve, llm, chart, ...) runs inside a span. Spans
+nest via a context variable, so every span opened while answering one question shares that
+question's trace id. Finished spans are appended to a size-capped JSONL file and folded into
+counters served in Prometheus text format.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config.config import TRACE_ENABLED, TRACE_PATH, TRACE_HISTORY, TRACE_MAX_MB, METRICS_PORT
+from utils.tokens import count_tokens
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# Span attributes that feed the token counters
+TOKEN_ATTRS = ("prompt_tokens", "completion_tokens")
+
+
+class Tracer:
+    """Collects spans, keeps the most recent traces in memory and aggregates metrics."""
+
+    def __init__(self, path=TRACE_PATH, history=TRACE_HISTORY, enabled=TRACE_ENABLED,
+                 max_bytes=TRACE_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.history = history
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._traces = OrderedDict()  # trace_id -> [span records], most recently finished last
+        self._stages = defaultdict(lambda: [0, 0.0])  # span name -> [count, total seconds]
+        self._tokens = defaultdict(int)  # (provider, kind) -> tokens
+        self._cache = defaultdict(int)  # (span name, "hit" | "miss") -> count
+        self._errors = defaultdict(int)  # span name -> failures
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _open(self, name, attrs):
+        parent = _current_span.get()
+        return {
+            "name": name,
+            "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex[:16],
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent["span_id"] if parent else None,
+            "start": time.time(),
+            "attrs": dict(attrs),
+        }
+
+    def _close(self, record, started):
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        self.record(record)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time a block. Yields the span's attribute dict so results (counts, cache hits) can be added."""
+        if not self.enabled:
+            yield dict(attrs)
+            return
+
+        record = self._open(name, attrs)
+        token = _current_span.set(record)
+        started = time.perf_counter()
+        try:
+            yield record["attrs"]
+        except Exception as e:
+            record["attrs"]["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._close(record, started)
+
+    def stream(self, name, tokens, **attrs):
+        """Wrap a token generator in a span recording time to first token and completion tokens."""
+        if not self.enabled:
+            yield from tokens
+            return
+
+        # Opened on first iteration, so the span nests under whoever consumes the stream
+        record = self._open(name, attrs)
+        started = time.perf_counter()
+        parts = []
+        try:
+            for token in tokens:
+                if not parts:
+                    record["attrs"]["ttft_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                parts.append(token)
+                yield token
+        except Exception as e:
+            record["attrs"]["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["attrs"]["completion_tokens"] = count_tokens("".join(parts))
+            self._close(record, started)
+
+    def record(self, record):
+        name, attrs = record["name"], record["attrs"]
+        with self._lock:
+            spans = self._traces.setdefault(record["trace_id"], [])
+            spans.append(record)
+            self._traces.move_to_end(record["trace_id"])
+            while len(self._traces) > self.history:
+                self._traces.popitem(last=False)
+
+            stage = self._stages[name]
+            stage[0] += 1
+            stage[1] += record["duration_ms"] / 1000
+            for kind in TOKEN_ATTRS:
+                if kind in attrs:
+                    self._tokens[(attrs.get("provider", "unknown"), kind)] += attrs[kind]
+            if "cache_hit" in attrs:
+                self._cache[(name, "hit" if attrs["cache_hit"] else "miss")] += 1
+            if "error" in attrs:
+                self._errors[name] += 1
+
+            if self.path:
+                self._write(record)
+
+    def _write(self, record):
+        # One previous file is kept, so disk use stays under twice the cap
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            os.replace(self.path, f"{self.path}.1")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def traces(self):
+        """Recent traces, newest first, as (root span, spans ordered by start time)."""
+        with self._lock:
+            traces = [list(spans) for spans in reversed(self._traces.values())]
+        result = []
+        for spans in traces:
+            root = next((s for s in spans if s["parent_id"] is None), None)
+            if root is not None:  # still running traces have no root yet
+                result.append((root, sorted(spans, key=lambda s: s["start"])))
+        return result
+
+    def last_trace(self, name, **attrs):
+        """Spans of the most recent finished trace whose root span is `name` and carries `attrs`
+        (e.g. session=...), or []."""
+        return next(
+            (spans for root, spans in self.traces()
+             if root["name"] == name and all(root["attrs"].get(k) == v for k, v in attrs.items())),
+            [],
+        )
+
+    def prometheus(self):
+        """Aggregated counters in the Prometheus text exposition format."""
+        with self._lock:
+            stages = {name: tuple(values) for name, values in self._stages.items()}
+            tokens, cache, errors = dict(self._tokens), dict(self._cache), dict(self._errors)
+
+        lines = [
+            "# HELP finbot_stage_seconds Time spent per pipeline stage.",
+            "# TYPE finbot_stage_seconds summary",
+        ]
+        for name, (count, seconds) in sorted(stages.items()):
+            lines.append(f'finbot_stage_seconds_count{{stage="{name}"}} {count}')
+            lines.append(f'finbot_stage_seconds_sum{{stage="{name}"}} {seconds:.6f}')
+
+        lines += ["# HELP finbot_tokens_total LLM tokens by provider.", "# TYPE finbot_tokens_total counter"]
+        for (provider, kind), count in sorted(tokens.items()):
+            lines.append(f'finbot_tokens_total{{provider="{provider}",kind="{kind.split("_")[0]}"}} {count}')
+
+        lines += ["# HELP finbot_cache_requests_total Cache lookups by stage.", "# TYPE finbot_cache_requests_total counter"]
+        for (name, result), count in sorted(cache.items()):
+            lines.append(f'finbot_cache_requests_total{{stage="{name}",result="{result}"}} {count}')
+
+        lines += ["# HELP finbot_stage_errors_total Failed spans by stage.", "# TYPE finbot_stage_errors_total counter"]
+        for name, count in sorted(errors.items()):
+            lines.append(f'finbot_stage_errors_total{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def in_current_trace(fn):
+    """Wrap fn so that calls on worker threads are recorded under the caller's span."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+tracer = Tracer()
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = tracer.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the app's log
+
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread. Safe to call on every rerun; returns the server or None."""
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                return None  # another process (e.g. a second app instance) already serves the port
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server
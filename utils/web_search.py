@@ -1,11 +1,158 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
 import requests
-from config.config import SERPAPI_API_KEY
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.config import (
+    SERPAPI_API_KEY,
+    SERPAPI_URL,
+    WEB_SEARCH_RESULTS,
+    WEB_SEARCH_TIMEOUT,
+    WEB_SEARCH_CACHE_TTL,
+    WEB_SEARCH_CACHE_SIZE,
+)
+from utils.answer_cache import normalize_question
+from utils.hybrid_retriever import tokenize
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Searches run beside the LLM call on these threads, so a fallback costs no extra round trip
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-search")
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=("GET",))
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_maxsize=8, max_retries=retry))
+            _session.mount("http://", HTTPAdapter(pool_maxsize=8, max_retries=retry))
+        return _session
+
+
+class _TTLCache:
+    """Results per normalized query; misses and errors are not cached."""
+
+    def __init__(self, max_entries=WEB_SEARCH_CACHE_SIZE, ttl=WEB_SEARCH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, results)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            if time.time() - hit[0] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return hit[1]
+
+    def put(self, key, results):
+        with self._lock:
+            self._entries[key] = (time.time(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache = _TTLCache()
+
+
+def canonical_url(url):
+    """Scheme, "www.", trailing slashes and tracking parameters don't make a different page."""
+    parts = urlsplit(url)
+    host = parts.netloc.lower().removeprefix("www.")
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith(("utm_", "gclid", "fbclid"))]
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{urlencode(query)}" if query else "")
+
+
+def rank_results(query, results):
+    """Drop duplicate pages and repeated snippets, then order by query-term coverage and engine rank."""
+    terms = set(tokenize(query))
+    seen_urls, seen_snippets, ranked = set(), set(), []
+    for position, result in enumerate(results):
+        url_key = canonical_url(result["link"]) if result["link"] else None
+        snippet_key = re.sub(r"\W+", " ", result["snippet"].lower()).strip()
+        if (url_key and url_key in seen_urls) or not snippet_key or snippet_key in seen_snippets:
+            continue
+        seen_urls.add(url_key)
+        seen_snippets.add(snippet_key)
+
+        coverage = len(terms & set(tokenize(f"{result['title']} {result['snippet']}"))) / len(terms) if terms else 0.0
+        ranked.append({**result, "score": round(coverage + 1 / (position + 2), 4)})
+    ranked.sort(key=lambda r: r["score"], reverse=True)
+    return ranked
+
+
+def search(query, num=WEB_SEARCH_RESULTS):
+    """Ranked, de-duplicated results as dicts (title, link, snippet, score); [] on failure."""
+    key = normalize_question(query)
+    if not key or not SERPAPI_API_KEY:
+        return []
+
+    with tracer.span("web_search") as span:
+        cached = _cache.get(key)
+        span["cache_hit"] = cached is not None
+        if cached is not None:
+            return cached[:num]
+
+        params = {"q": query, "api_key": SERPAPI_API_KEY, "engine": "google", "num": max(num * 2, 10)}
+        try:
+            response = _get_session().get(SERPAPI_URL, params=params, timeout=WEB_SEARCH_TIMEOUT)
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Web search failed: %s", e)
+            span["error"] = str(e)
+            return []
+
+        raw = [
+            {"title": r.get("title", ""), "link": r.get("link", ""), "snippet": r.get("snippet", "")}
+            for r in payload.get("organic_results", [])
+        ]
+        answer = payload.get("answer_box") or {}
+        if answer.get("snippet") or answer.get("answer"):
+            raw.insert(0, {"title": answer.get("title", ""), "link": answer.get("link", ""),
+                           "snippet": answer.get("snippet") or answer.get("answer")})
+
+        results = rank_results(query, raw)
+        span["results"] = len(results)
+        if results:
+            _cache.put(key, results)
+        return results[:num]
+
+
+def search_async(query, num=WEB_SEARCH_RESULTS):
+    """Start a search in the background; returns a Future of search()'s result."""
+    return _executor.submit(search, query, num)
+
 
 def search_web(query):
-    url = "https://serpapi.com/search"
-    params = {"q": query, "api_key": SERPAPI_API_KEY, "engine": "google"}
-    try:
-        res = requests.get(url, params=params).json()
-        return res["organic_results"][0]["snippet"]
-    except:
-        return "No relevant results found online."
+    results = search(query, num=1)
+    return results[0]["snippet"] if results else "No relevant results found online."
+
+
+def query_coverage(query, passages):
+    """Share of the question's terms found in the retrieved passages: a cheap retrieval-quality signal."""
+    terms = set(tokenize(query))
+    if not terms:
+        return 1.0
+    found = set()
+    for passage in passages:
+        found |= terms & set(tokenize(passage))
+    return len(found) / len(terms)
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+from models.embeddings import get_embeddings
+from utils.hybrid_retriever import BM25Index, HybridRetriever
+
+
+@dataclass
+class WorkspaceDocument:
+    doc_id: str  # ingest cache key of the document
+    name: str
+    chunk_ids: list = field(default_factory=list)
+    sparse_index: object = None  # BM25 over this document's chunks only
+    pages: int = 0
+    sheets: list = field(default_factory=list)
+
+
+class Workspace:
+    """Many documents in one FAISS index, each tagged with doc_id/source metadata.
+
+    Adding a document copies its vectors out of its own index (nothing is re-embedded) and
+    removing one deletes only its vectors, so cost follows the change, not the size of the
+    workspace.
+    """
+
+    def __init__(self):
+        self.vectorstore = None
+        self.documents = OrderedDict()
+
+    def __contains__(self, doc_id):
+        return doc_id in self.documents
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, entry):
+        """Add a processed IngestEntry (its vectorstore must be ready)."""
+        if entry.key in self.documents:
+            return self.documents[entry.key]
+        # FAISS loads with the first document rather than at app start
+        import faiss
+        from models.faiss_index import build_faiss_store, choose_index_type, stored_vectors, upgrade_index
+
+        source = entry.vectorstore
+        ordered_ids = [source.index_to_docstore_id[p] for p in range(len(source.index_to_docstore_id))]
+        chunk_ids = [f"{entry.key}:{n}" for n in range(len(ordered_ids))]
+        docs = []
+        for chunk_id, source_id in zip(chunk_ids, ordered_ids):
+            chunk = source.docstore.search(source_id)
+            docs.append(Document(
+                id=chunk_id,
+                page_content=chunk.page_content,
+                metadata={**chunk.metadata, "doc_id": entry.key, "source": entry.document.name},
+            ))
+
+        texts, metadatas = [d.page_content for d in docs], [d.metadata for d in docs]
+        vectors = stored_vectors(source)
+        if vectors is None:  # product-quantized codes are lossy; embed (cache-served) instead
+            vectors = get_embeddings().embed_documents(texts)
+        if self.vectorstore is None:
+            self.vectorstore = build_faiss_store(texts, metadatas, get_embeddings(), ids=chunk_ids, vectors=vectors)
+        else:
+            self.vectorstore.add_embeddings(zip(texts, list(vectors)), metadatas=metadatas, ids=chunk_ids)
+            if isinstance(self.vectorstore.index, faiss.IndexFlat) and \
+                    choose_index_type(self.vectorstore.index.ntotal) != "flat":
+                upgrade_index(self.vectorstore)
+
+        document = WorkspaceDocument(
+            doc_id=entry.key,
+            name=entry.document.name,
+            chunk_ids=chunk_ids,
+            sparse_index=self._sparse_index(entry, chunk_ids, docs),
+            pages=len(entry.document.pages),
+            sheets=sorted({metadata["sheet"] for metadata, _, _ in entry.document.blocks}),
+        )
+        self.documents[entry.key] = document
+        return document
+
+    @staticmethod
+    def _sparse_index(entry, chunk_ids, docs):
+        # The BM25 index stored at ingest shares the source index's positions, so it only
+        # needs its ids and metadata re-pointed at the workspace copies
+        if entry.sparse_index is not None and len(entry.sparse_index.docstore_ids) == len(chunk_ids):
+            return BM25Index(chunk_ids, entry.sparse_index.postings, [d.metadata for d in docs])
+        return BM25Index.from_documents(chunk_ids, docs)
+
+    def remove(self, doc_id):
+        document = self.documents.pop(doc_id, None)
+        if document is None:
+            return
+        if self.documents:
+            from models.faiss_index import delete_from_store
+
+            delete_from_store(self.vectorstore, document.chunk_ids)
+        else:
+            self.vectorstore = None
+
+    def retriever(self, doc_ids=None, filters=None, **kwargs):
+        """Hybrid retriever over one document, a subset, or (doc_ids=None) all of them."""
+        if self.vectorstore is None:
+            return None
+        selected = [d for d in (doc_ids or self.documents) if d in self.documents]
+        filters = dict(filters or {})
+        if len(selected) < len(self.documents):
+            filters["doc_id"] = selected
+        return HybridRetriever(
+            vectorstore=self.vectorstore,
+            sparse_indexes=[self.documents[d].sparse_index for d in selected],
+            filters=filters,
+            **kwargs,
+        )